@@ -1,344 +1,403 @@
 #!/usr/bin/env python3
 import argparse
+import csv
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
 import re
 import time
-import pandas as pd
 import subprocess
+import functools
+import logging
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import orjson
+except ImportError:  # optional speed-up; fall back to the stdlib encoder
+    orjson = None
+
+log = logging.getLogger(__name__)
+
+# Upper bound on in-flight Okta API calls during per-role/per-resource-set fan-out.
+MAX_CONCURRENT_REQUESTS = 10
+
+# Only user ids, emails and logins are used, so ask Okta to leave the credentials
+# objects and their links out of every /users page.
+USERS_LIST_HEADERS = {
+    "Content-Type": "application/json; okta-response=omitCredentials,omitCredentialsLinks,omitTransitioningToStatus"
+}
+
+# Characters dropped from labels by normalize_resource_name; compiled once at import.
+INVALID_NAME_CHARS_RE = re.compile(r'[^a-z0-9_]')
+
+# Okta API collections that resource-set members point at, and the data source each resolves to.
+MEMBER_DATA_SOURCES = {"groups": "okta_group", "users": "okta_user", "apps": "okta_app"}
 
 # ----- Helper Functions -----
 
+# Okta domain suffix for each domain flag.
+DOMAIN_MAP = {
+    "default": "okta.com",
+    "emea": "okta-emea.com",
+    "preview": "oktapreview.com",
+    "gov": "okta-gov.com",
+    "mil": "okta.mil"
+}
+
 def get_okta_domain(subdomain, domain_flag):
     """Build the Okta domain URL using a subdomain and domain_flag."""
-    domain_map = {
-        "default": "okta.com",
-        "emea": "okta-emea.com",
-        "preview": "oktapreview.com",
-        "gov": "okta-gov.com",
-        "mil": "okta.mil"
-    }
-    domain = domain_map.get(domain_flag, "okta.com")
+    domain = DOMAIN_MAP.get(domain_flag, "okta.com")
     return f"{subdomain}.{domain}"
 
-def get_api_data(url, headers, retry_count=3):
-    """Query an Okta API endpoint with basic rate-limit handling."""
-    response = requests.get(url, headers=headers)
-    if response.status_code == 200:
-        return response.json(), response.headers
-    elif response.status_code == 429:
+class OktaRetry(Retry):
+    """urllib3 Retry that, on a 429 without Retry-After, waits until Okta's x-rate-limit-reset epoch."""
+
+    def get_retry_after(self, response):
+        retry_after = super().get_retry_after(response)
+        if retry_after is not None or response.status != 429:
+            return retry_after
         reset = response.headers.get("x-rate-limit-reset")
         if reset:
-            current_time = time.time()
-            sleep_time = int(reset) - current_time
-            if sleep_time < 0:
-                sleep_time = 1
-            print(f"Rate limit reached. Sleeping for {sleep_time:.2f} seconds before retrying {url}.")
-            time.sleep(sleep_time)
-        else:
-            print("Rate limit reached but no reset header found. Sleeping for 60 seconds.")
-            time.sleep(60)
-        if retry_count > 0:
-            return get_api_data(url, headers, retry_count - 1)
+            sleep_time = max(1, int(reset) - int(time.time()))
         else:
-            print(f"Retries exhausted for {url}")
-            return None, response.headers
+            sleep_time = 60
+        log.warning("Rate limit reached. Sleeping for %d seconds before retrying.", sleep_time)
+        return sleep_time
+
+class ETagCacheAdapter(HTTPAdapter):
+    """HTTPAdapter that revalidates GETs with If-None-Match and replays the cached body on 304."""
+
+    def __init__(self, cache, **kwargs):
+        super().__init__(**kwargs)
+        self.cache = cache
+
+    def send(self, request, **kwargs):
+        cached = self.cache.get(request.url) if request.method == "GET" else None
+        if cached:
+            request.headers["If-None-Match"] = cached["etag"]
+        response = super().send(request, **kwargs)
+        if cached and response.status_code == 304:
+            log.debug("Not modified, using cached body for %s", request.url)
+            response.status_code = 200
+            response._content = cached["body"].encode("utf-8")
+            # 304s do not have to repeat the Link header, and pagination depends on it.
+            if cached.get("link"):
+                response.headers["Link"] = cached["link"]
+        elif response.status_code == 200 and response.headers.get("ETag"):
+            self.cache[request.url] = {
+                "etag": response.headers["ETag"],
+                "body": response.text,
+                "link": response.headers.get("Link"),
+            }
+        return response
+
+def load_etag_cache(path):
+    """Load the URL -> ETag/body cache written by a previous run; a missing or unreadable file starts empty."""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_etag_cache(cache, path):
+    with open(path, "w") as f:
+        json.dump(cache, f)
+
+def build_session(api_token, etag_cache=None):
+    """Create a requests.Session with Okta auth headers and a connection pool sized for concurrent fetches.
+
+    When etag_cache is given, GETs are revalidated against it so unchanged responses come back as 304s.
+    """
+    session = requests.Session()
+    session.headers.update({
+        "Authorization": f"SSWS {api_token}",
+        "Accept": "application/json"
+    })
+    # Rate limits and transient gateway errors are retried inside urllib3: 429s wait for Okta's
+    # x-rate-limit-reset (see OktaRetry), gateway errors back off exponentially.
+    retry = OktaRetry(total=5, backoff_factor=1.0, status_forcelist=[429, 502, 503, 504],
+                  allowed_methods=["GET"], respect_retry_after_header=True, raise_on_status=False)
+    pool_kwargs = dict(pool_connections=1, pool_maxsize=MAX_CONCURRENT_REQUESTS, max_retries=retry)
+    if etag_cache is not None:
+        adapter = ETagCacheAdapter(etag_cache, **pool_kwargs)
     else:
-        print(f"Error: {response.status_code} when querying {url}")
-        return None, response.headers
+        adapter = HTTPAdapter(**pool_kwargs)
+    session.mount("https://", adapter)
+    return session
 
+def get_api_data(url, session, headers=None):
+    """Query an Okta API endpoint; returns (json, parsed Link header). Retries happen in the session adapter."""
+    response = session.get(url, headers=headers)
+    if response.status_code == 200:
+        return parse_json(response), response.links
+    log.error("Error: %s when querying %s", response.status_code, url)
+    return None, response.links
+
+def parse_json(response):
+    """Decode a response body as JSON, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(response.content)
+    return response.json()
+
+def dumps_json(obj):
+    """Serialize obj as 2-space indented JSON, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode()
+    return json.dumps(obj, indent=2)
+
+def hcl_string(value):
+    """Quote a value as an HCL string literal; HCL accepts JSON-style escapes for quotes, backslashes and newlines."""
+    return json.dumps(value or "", ensure_ascii=False)
+
+# Cached because the same labels and ids are normalized again for maps, data blocks, resources and imports.
+@functools.lru_cache(maxsize=None)
 def normalize_resource_name(label):
     """Normalize a label to a valid Terraform resource name."""
     normalized = label.lower().replace(" ", "_")
-    normalized = re.sub(r'[^a-z0-9_]', '', normalized)
+    normalized = INVALID_NAME_CHARS_RE.sub('', normalized)
     if normalized and normalized[0].isdigit():
         normalized = "_" + normalized
     return normalized
 
-def substitute_member(member, group_map, user_map, app_map=None, okta_domain=""):
+def make_substituter(group_map, user_map, app_map=None, okta_domain=""):
     """
-    Substitute a member URL with an environment-independent interpolation.
-    Handles query filters and trailing segments.
+    Return a memoized function that substitutes a member URL with an
+    environment-independent interpolation, handling query filters and trailing
+    segments. The maps and domain are fixed for a run, so they are bound once here.
     """
-    if "apps?filter" in member:
-        new_url = member.replace(f"https://{okta_domain}", "${local.org_url}")
-        new_url = new_url.replace('"', '\\"')
-        return new_url
-
-    if member.endswith("/api/v1/groups"):
-        return "${local.org_url}/api/v1/groups"
-    if member.endswith("/api/v1/users"):
-        return "${local.org_url}/api/v1/users"
-    if member.endswith("/api/v1/apps"):
-        return "${local.org_url}/api/v1/apps"
-
-    # For groups
-    group_pattern = r'/api/v1/groups/([^/]+)(/.*)?$'
-    m_group = re.search(group_pattern, member)
-    if m_group:
-        gid = m_group.group(1)
-        extra = m_group.group(2) if m_group.group(2) else ""
-        if gid in group_map:
-            normalized = group_map[gid]
-            return '${local.org_url}/api/v1/groups/${data.okta_group.' + normalized + '.id}' + extra
-
-    # For users:
-    user_pattern = r'/api/v1/users/([^/]+)$'
-    m_user = re.search(user_pattern, member)
-    if m_user:
-        uid = m_user.group(1)
-        if uid in user_map:
-            normalized = user_map[uid]
-            return '${local.org_url}/api/v1/users/${data.okta_user.' + normalized + '.id}'
-    # For apps:
-    app_pattern = r'/api/v1/apps/([^/]+)(/.*)?$'
-    m_app = re.search(app_pattern, member)
-    if m_app:
-        aid = m_app.group(1)
-        extra = m_app.group(2) if m_app.group(2) else ""
-        if app_map and aid in app_map:
-            normalized = app_map[aid]
-            return '${local.org_url}/api/v1/apps/${data.okta_app.' + normalized + '.id}' + extra
-    return member.replace('"', '\\"')
-
-# ----- Mapping Builders (using Pandas) -----
+    org_prefix = f"https://{okta_domain}"
+    member_maps = {"groups": group_map, "users": user_map, "apps": app_map or {}}
+    data_sources = MEMBER_DATA_SOURCES
+
+    @functools.lru_cache(maxsize=None)
+    def substitute(member):
+        if "apps?filter" in member:
+            return member.replace(org_prefix, "${local.org_url}")
+
+        # Member URLs are <org>/api/v1/<kind>[/<id>[/<extra>]]; split them instead of pattern matching.
+        _, found, path = member.partition("/api/v1/")
+        if not found:
+            return member
+        kind, slash, rest = path.partition("/")
+        if kind not in data_sources:
+            return member
+        if not slash:
+            # Whole-collection endpoints such as /api/v1/groups.
+            return "${local.org_url}/api/v1/" + kind
+        member_id, slash, extra = rest.partition("/")
+        # Users are only substituted when the URL ends at the user id.
+        if not member_id or (kind == "users" and slash):
+            return member
+        member_map = member_maps[kind]
+        if member_id not in member_map:
+            return member
+        return ("${local.org_url}/api/v1/" + kind + "/${data." + data_sources[kind] + "."
+                + member_map[member_id] + ".id}" + slash + extra)
+
+    return substitute
+
+# ----- Mapping Builders -----
+
+def group_display_name(group):
+    """Return the name a group is known by: profile.name, then top-level name, then its id."""
+    profile = group.get("profile")
+    if isinstance(profile, dict) and profile.get("name"):
+        return profile["name"]
+    return group.get("name") or group.get("id")
+
+def user_display_name(user):
+    """Return the name a user is known by: profile.email, then login, then their id."""
+    profile = user.get("profile")
+    if isinstance(profile, dict) and profile.get("email"):
+        return profile["email"]
+    return user.get("login") or user.get("id")
+
+def app_display_name(app):
+    """Return the name an app is known by: label, then name, then its id."""
+    return app.get("label") or app.get("name") or app.get("id")
 
 def build_group_mapping(groups):
-    df = pd.DataFrame(groups)
-    # Use profile.name if available; else fallback to "name"
-    if "profile" in df.columns:
-        # Some JSON may nest profile as a dict; if so, extract 'name'
-        df["display"] = df["profile"].apply(lambda p: p.get("name") if isinstance(p, dict) and "name" in p else None)
-    elif "name" in df.columns:
-        df["display"] = df["name"]
-    else:
-        df["display"] = df["id"]
-    df["display"] = df["display"].fillna(df["id"])
-    df["normalized"] = df["display"].apply(normalize_resource_name)
-    mapping = { row["id"]: row["normalized"] for _, row in df.iterrows() }
-    return mapping
+    return {group.get("id"): normalize_resource_name(group_display_name(group)) for group in groups}
 
 def build_user_mapping(users):
-    df = pd.DataFrame(users)
-    if "profile" in df.columns:
-        df["display"] = df["profile"].apply(lambda p: p.get("email") if isinstance(p, dict) and "email" in p else None)
-    elif "login" in df.columns:
-        df["display"] = df["login"]
-    else:
-        df["display"] = df["id"]
-    df["display"] = df["display"].fillna(df["id"])
-    df["normalized"] = df["display"].apply(normalize_resource_name)
-    mapping = { row["id"]: row["normalized"] for _, row in df.iterrows() }
-    return mapping
+    return {user.get("id"): normalize_resource_name(user_display_name(user)) for user in users}
 
 def build_app_mapping(apps):
-    df = pd.DataFrame(apps)
-    if "label" in df.columns:
-        df["display"] = df["label"].fillna(df["id"])
-    elif "name" in df.columns:
-        df["display"] = df["name"].fillna(df["id"])
-    else:
-        df["display"] = df["id"]
-    df["normalized"] = df["display"].apply(normalize_resource_name)
-    mapping = { row["id"]: row["normalized"] for _, row in df.iterrows() }
-    return mapping
+    return {app.get("id"): normalize_resource_name(app_display_name(app)) for app in apps}
 
 # ----- API Data Fetching Functions -----
 
-def fetch_roles(okta_domain, headers):
-    roles = []
-    endpoint = f"https://{okta_domain}/api/v1/iam/roles"
+def fetch_concurrently(fetch, items, max_workers=MAX_CONCURRENT_REQUESTS):
+    """Call fetch(item) for every item on a bounded thread pool; results keep input order."""
+    if not items:
+        return []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(fetch, items))
+
+def iter_iam_collection(endpoint, session, key, label):
+    """Yield items of an IAM collection page by page, following _links.next as each page arrives."""
     while endpoint:
-        print(f"Fetching roles from: {endpoint}")
-        data, _ = get_api_data(endpoint, headers)
+        log.info("Fetching %s from: %s", label, endpoint)
+        data, _ = get_api_data(endpoint, session)
         if not data:
             break
-        roles.extend(data.get("roles", []))
-        next_link = data.get("_links", {}).get("next", {}).get("href")
-        endpoint = next_link if next_link else None
-    return roles
+        yield from data.get(key, [])
+        endpoint = data.get("_links", {}).get("next", {}).get("href")
+
+def fetch_roles(okta_domain, session):
+    return list(iter_iam_collection(f"https://{okta_domain}/api/v1/iam/roles", session, "roles", "roles"))
 
-def fetch_role_permissions(okta_domain, role_id, headers):
+# Cached so a role or resource set id seen twice (duplicate pages, repeated calls) is only fetched once.
+@functools.lru_cache(maxsize=None)
+def fetch_role_permissions(okta_domain, role_id, session):
     endpoint = f"https://{okta_domain}/api/v1/iam/roles/{role_id}/permissions"
-    print(f"Fetching permissions from: {endpoint}")
-    data, _ = get_api_data(endpoint, headers)
+    log.debug("Fetching permissions from: %s", endpoint)
+    data, _ = get_api_data(endpoint, session)
     if data and "permissions" in data:
         return [perm.get("label") for perm in data["permissions"] if perm.get("label")]
     return []
 
-def fetch_resource_sets(okta_domain, headers):
-    resource_sets = []
-    endpoint = f"https://{okta_domain}/api/v1/iam/resource-sets"
-    while endpoint:
-        print(f"Fetching resource sets from: {endpoint}")
-        data, _ = get_api_data(endpoint, headers)
-        if not data:
-            break
-        resource_sets.extend(data.get("resource-sets", []))
-        next_link = data.get("_links", {}).get("next", {}).get("href")
-        endpoint = next_link if next_link else None
-    return resource_sets
+def fetch_resource_sets(okta_domain, session):
+    return list(iter_iam_collection(f"https://{okta_domain}/api/v1/iam/resource-sets", session,
+                                    "resource-sets", "resource sets"))
 
-def fetch_resource_set_resources(okta_domain, resource_set_id, headers):
+@functools.lru_cache(maxsize=None)
+def fetch_resource_set_resources(okta_domain, resource_set_id, session):
     endpoint = f"https://{okta_domain}/api/v1/iam/resource-sets/{resource_set_id}/resources"
-    print(f"Fetching resource set resources from: {endpoint}")
-    data, _ = get_api_data(endpoint, headers)
+    log.debug("Fetching resource set resources from: %s", endpoint)
+    data, _ = get_api_data(endpoint, session)
     resources = []
     if data and "resources" in data:
         for res in data["resources"]:
             links = res.get("_links")
             if not links:
-                print(f"DEBUG: Resource {res.get('id')} missing '_links'.")
+                log.debug("Resource %s missing '_links'.", res.get("id"))
                 continue
             self_link_obj = links.get("self")
             if not self_link_obj:
-                print(f"DEBUG: Resource {res.get('id')} missing 'self' link.")
+                log.debug("Resource %s missing 'self' link.", res.get("id"))
                 continue
             href = self_link_obj.get("href")
             if href:
                 resources.append(href)
             else:
-                print(f"DEBUG: Resource {res.get('id')} has 'self' but no 'href'.")
+                log.debug("Resource %s has 'self' but no 'href'.", res.get("id"))
     else:
-        print(f"DEBUG: No 'resources' key in response for resource set {resource_set_id}.")
+        log.debug("No 'resources' key in response for resource set %s.", resource_set_id)
     return resources
 
-def fetch_all_groups(okta_domain, headers):
-    groups = []
-    endpoint = f"https://{okta_domain}/api/v1/groups"
+def iter_link_collection(endpoint, session, label, headers=None):
+    """Yield items of a Link-paginated collection page by page, following rel="next" as each page arrives."""
     while endpoint:
-        print(f"Fetching groups from: {endpoint}")
-        resp = requests.get(endpoint, headers=headers)
-        if resp.status_code == 200:
-            data = resp.json()
-            groups.extend(data)
-            link_header = resp.headers.get("Link")
-            next_url = None
-            if link_header:
-                links = re.findall(r'<([^>]+)>;\s*rel="next"', link_header)
-                if links:
-                    next_url = links[0]
-            endpoint = next_url
-        else:
-            print(f"Error: {resp.status_code} when fetching groups from {endpoint}")
+        log.info("Fetching %s from: %s", label, endpoint)
+        data, links = get_api_data(endpoint, session, headers)
+        if not data:
             break
-    return groups
+        yield from data
+        endpoint = links.get("next", {}).get("url")
 
-def fetch_all_users(okta_domain, headers):
-    users = []
-    endpoint = f"https://{okta_domain}/api/v1/users"
-    while endpoint:
-        print(f"Fetching users from: {endpoint}")
-        resp = requests.get(endpoint, headers=headers)
-        if resp.status_code == 200:
-            data = resp.json()
-            users.extend(data)
-            link_header = resp.headers.get("Link")
-            next_url = None
-            if link_header:
-                links = re.findall(r'<([^>]+)>;\s*rel="next"', link_header)
-                if links:
-                    next_url = links[0]
-            endpoint = next_url
-        else:
-            print(f"Error: {resp.status_code} when fetching users from {endpoint}")
-            break
-    return users
+def fetch_all_groups(okta_domain, session):
+    return list(iter_link_collection(f"https://{okta_domain}/api/v1/groups", session, "groups"))
 
-def fetch_group_roles(okta_domain, group_id, headers):
+def fetch_all_users(okta_domain, session):
+    return list(iter_link_collection(f"https://{okta_domain}/api/v1/users", session, "users", USERS_LIST_HEADERS))
+
+def fetch_group_roles(okta_domain, group_id, session):
     endpoint = f"https://{okta_domain}/api/v1/groups/{group_id}/roles"
-    print(f"Fetching group roles for group {group_id} from: {endpoint}")
-    data, _ = get_api_data(endpoint, headers)
+    log.debug("Fetching group roles for group %s from: %s", group_id, endpoint)
+    data, _ = get_api_data(endpoint, session)
     return data if data else []
 
-def fetch_user_roles(okta_domain, user_id, headers):
+def fetch_user_roles(okta_domain, user_id, session):
     endpoint = f"https://{okta_domain}/api/v1/users/{user_id}/roles"
-    print(f"Fetching user roles for user {user_id} from: {endpoint}")
-    data, _ = get_api_data(endpoint, headers)
+    log.debug("Fetching user roles for user %s from: %s", user_id, endpoint)
+    data, _ = get_api_data(endpoint, session)
     return data if data else []
 
-def fetch_apps(okta_domain, headers):
-    apps = []
-    endpoint = f"https://{okta_domain}/api/v1/apps"
-    while endpoint:
-        print(f"Fetching apps from: {endpoint}")
-        data, hdrs = get_api_data(endpoint, headers)
-        if not data:
-            break
-        apps.extend(data)
-        link_header = hdrs.get("Link")
-        next_url = None
-        if link_header:
-            links = re.findall(r'<([^>]+)>;\s*rel="next"', link_header)
-            if links:
-                next_url = links[0]
-        endpoint = next_url
-    return apps
+def fetch_apps(okta_domain, session):
+    # Apps default to 20 per page; ask for the maximum so the Link chain is ~10x shorter.
+    return list(iter_link_collection(f"https://{okta_domain}/api/v1/apps?limit=200", session, "apps"))
 
 # ----- Debugging with Pandas & CSV Output -----
 
-def debug_with_pandas(resource_sets, roles, okta_domain, headers, tf_file, args, group_map, user_map, app_map):
+def normalize_series(series):
+    """Vectorized normalize_resource_name over a pandas Series of labels."""
+    normalized = (series.fillna("").astype(str).str.lower()
+                  .str.replace(" ", "_", regex=False)
+                  .str.replace(INVALID_NAME_CHARS_RE, "", regex=True))
+    return normalized.where(~normalized.str[:1].str.isdigit(), "_" + normalized)
+
+def write_debug_csv(rows, path):
+    """
+    Stream a list of Okta objects to a CSV, one column per top-level API field in first-seen order.
+    Nested objects such as profile are written as their Python repr, as pandas did.
+    """
+    fieldnames = list(dict.fromkeys(key for row in rows for key in row))
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(rows)
+
+def write_debug_dataframes(resource_sets, roles, groups, users, apps):
+    """
+    Print DataFrame previews, with derived display/normalized names, for the fetched Okta objects.
+    The debug CSVs themselves are written by write_debug_csv in main().
+    """
+    # pandas is only needed for --debug output, so it is imported here rather than at startup.
+    import pandas as pd
+
     # Debug Resource Sets
     df_rs = pd.DataFrame(resource_sets)
     print("Resource Sets DataFrame:")
     if not df_rs.empty:
         print(df_rs[['id', 'label', 'description']].head())
-        df_rs.to_csv("debug_resource_sets.csv", index=False)
-        print("Resource sets CSV written to debug_resource_sets.csv")
     else:
         print("No resource sets data available.")
     
     # Debug IAM Roles
     df_roles = pd.DataFrame(roles)
     if not df_roles.empty:
-        df_roles["normalized"] = df_roles["label"].apply(normalize_resource_name)
+        df_roles["normalized"] = normalize_series(df_roles["label"])
         print("IAM Roles DataFrame with Normalized Names:")
         print(df_roles[['id', 'label', 'normalized', 'description']].head())
-        df_roles.to_csv("debug_iam_roles.csv", index=False)
-        print("IAM roles CSV written to debug_iam_roles.csv")
     else:
         print("No roles data available.")
     
     # Debug Groups
-    groups = fetch_all_groups(okta_domain, headers)
     df_groups = pd.DataFrame(groups)
     if not df_groups.empty:
         if "profile" in df_groups.columns:
-            df_groups["display"] = df_groups["profile"].apply(lambda p: p.get("name") if isinstance(p, dict) and "name" in p else None)
+            df_groups["display"] = df_groups["profile"].str.get("name")
         elif "name" in df_groups.columns:
             df_groups["display"] = df_groups["name"]
         else:
             df_groups["display"] = df_groups["id"]
         df_groups["display"] = df_groups["display"].fillna(df_groups["id"])
-        df_groups["normalized"] = df_groups["display"].apply(normalize_resource_name)
+        df_groups["normalized"] = normalize_series(df_groups["display"])
         print("Groups DataFrame:")
         print(df_groups.head())
-        df_groups.to_csv("debug_groups.csv", index=False)
-        print("Groups CSV written to debug_groups.csv")
     else:
         print("No groups data available.")
     
     # Debug Users
-    users = fetch_all_users(okta_domain, headers)
     df_users = pd.DataFrame(users)
     if not df_users.empty:
         if "profile" in df_users.columns:
-            df_users["display"] = df_users["profile"].apply(lambda p: p.get("email") if isinstance(p, dict) and "email" in p else None)
+            df_users["display"] = df_users["profile"].str.get("email")
         elif "login" in df_users.columns:
             df_users["display"] = df_users["login"]
         else:
             df_users["display"] = df_users["id"]
         df_users["display"] = df_users["display"].fillna(df_users["id"])
-        df_users["normalized"] = df_users["display"].apply(normalize_resource_name)
+        df_users["normalized"] = normalize_series(df_users["display"])
         print("Users DataFrame:")
         print(df_users.head())
-        df_users.to_csv("debug_users.csv", index=False)
-        print("Users CSV written to debug_users.csv")
     else:
         print("No users data available.")
     
     # Debug Apps
-    apps = fetch_apps(okta_domain, headers)
     df_apps = pd.DataFrame(apps)
     if not df_apps.empty:
         if "label" in df_apps.columns:
@@ -347,393 +406,291 @@ def debug_with_pandas(resource_sets, roles, okta_domain, headers, tf_file, args,
             df_apps["display"] = df_apps["name"].fillna(df_apps["id"])
         else:
             df_apps["display"] = df_apps["id"]
-        df_apps["normalized"] = df_apps["display"].apply(normalize_resource_name)
+        df_apps["normalized"] = normalize_series(df_apps["display"])
         print("Apps DataFrame:")
         print(df_apps.head())
-        df_apps.to_csv("debug_apps.csv", index=False)
-        print("Apps CSV written to debug_apps.csv")
     else:
         print("No apps data available.")
+
+def debug_with_pandas(resource_sets, roles, groups, users, apps, okta_domain, session, args):
+    if args.debug:
+        write_debug_dataframes(resource_sets, roles, groups, users, apps)
     
-    # For groups and users, fetch roles.
-    group_roles_by_group = {}
-    for group in groups:
-        gid = group.get("id")
-        assignments = fetch_group_roles(okta_domain, gid, headers)
-        if assignments:
-            group_roles_by_group[gid] = assignments
-
-    user_roles_by_user = {}
-    for user in users:
-        uid = user.get("id")
-        assignments = fetch_user_roles(okta_domain, uid, headers)
-        if assignments:
-            user_roles_by_user[uid] = assignments
-
-    # Generate Terraform blocks for group and user roles.
-    generate_import_blocks_for_group_roles(group_roles_by_group, tf_file)
-    generate_terraform_group_roles(group_roles_by_group, tf_file, args.terraform_format, group_map)
-    generate_import_blocks_for_user_roles(user_roles_by_user, tf_file)
-    generate_terraform_user_roles(user_roles_by_user, tf_file, args.terraform_format, user_map)
+    # For groups and users, fetch roles. One request per member, so fan them out.
+    group_ids = [group.get("id") for group in groups]
+    group_assignments = fetch_concurrently(
+        lambda gid: fetch_group_roles(okta_domain, gid, session), group_ids)
+    group_roles_by_group = {gid: assignments
+                            for gid, assignments in zip(group_ids, group_assignments) if assignments}
+
+    user_ids = [user.get("id") for user in users]
+    user_assignments = fetch_concurrently(
+        lambda uid: fetch_user_roles(okta_domain, uid, session), user_ids)
+    user_roles_by_user = {uid: assignments
+                          for uid, assignments in zip(user_ids, user_assignments) if assignments}
 
     return group_roles_by_group, user_roles_by_user
 
 # ----- Data Blocks Generators -----
 
-def generate_data_blocks_for_groups(groups, data_tf_file):
-    with open(data_tf_file, "w") as f:
-        f.write("# Generated Data Blocks for Okta Groups\n\n")
-        for group in groups:
-            group_id = group.get("id")
-            # Prefer using the group's name from profile if available.
-            if "profile" in group and isinstance(group["profile"], dict) and group["profile"].get("name"):
-                group_name = group["profile"]["name"]
-            elif "name" in group:
-                group_name = group["name"]
-            else:
-                group_name = group_id
-            normalized = normalize_resource_name(group_name)
-            # Use the data source schema with "name" as a filter.
-            block = f'''
-data "okta_group" "{normalized}" {{
-  name = "{group_name}"
-}}
-'''
-            f.write(block)
-
-def generate_data_blocks_for_users(users, data_tf_file):
-    with open(data_tf_file, "a") as f:
-        f.write("\n# Generated Data Blocks for Okta Users\n\n")
-        for user in users:
-            user_id = user.get("id")
-            # Use profile.email if available.
-            if "profile" in user and isinstance(user["profile"], dict) and user["profile"].get("email"):
-                user_email = user["profile"]["email"]
-            elif "login" in user:
-                user_email = user["login"]
-            else:
-                user_email = user_id
-            normalized = normalize_resource_name(user_email)
-            block = f'''
-data "okta_user" "{normalized}" {{
-  search {{
-    expression = "profile.email eq \\"{user_email}\\""
-  }}
-}}
+# %-style templates: every data block is a fixed shape filled with one or two strings.
+# Names and expressions are passed in already quoted by hcl_string.
+DATA_GROUP_TEMPLATE = '''
+data "okta_group" "%s" {
+  name = %s
+}
 '''
-            f.write(block)
-
-def generate_data_blocks_for_resource_sets(resource_sets, data_tf_file):
-    with open(data_tf_file, "a") as f:
-        f.write("\n# Generated Data Blocks for Okta Resource Sets\n\n")
-        for rs in resource_sets:
-            rs_id = rs.get("id")
-            label = rs.get("label")
-            normalized = normalize_resource_name(label)
-            block = f'''
-data "okta_resource_set" "{normalized}" {{
-  id = "{rs_id}"
-}}
+
+DATA_USER_TEMPLATE = '''
+data "okta_user" "%s" {
+  search {
+    expression = %s
+  }
+}
 '''
-            f.write(block)
-
-def generate_data_blocks_for_custom_roles(roles, data_tf_file):
-    with open(data_tf_file, "a") as f:
-        f.write("\n# Generated Data Blocks for Okta Custom Admin Roles\n\n")
-        for role in roles:
-            if role.get("id", "").startswith("cr"):
-                role_id = role.get("id")
-                label = role.get("label")
-                normalized = normalize_resource_name(label)
-                block = f'''
-data "okta_admin_role_custom" "{normalized}" {{
-  id = "{role_id}"
-}}
+
+DATA_BY_ID_TEMPLATE = '''
+data "%s" "%s" {
+  id = "%s"
+}
 '''
-                f.write(block)
 
-def generate_data_blocks_for_apps(app_map, data_tf_file):
+def generate_data_blocks_for_groups(groups, group_map, out):
+    out.append("# Generated Data Blocks for Okta Groups\n\n")
+    # Use the data source schema with "name" as a filter.
+    out.append("".join(DATA_GROUP_TEMPLATE % (group_map[group.get("id")], hcl_string(group_display_name(group)))
+                       for group in groups))
+
+def generate_data_blocks_for_users(users, user_map, out):
+    out.append("\n# Generated Data Blocks for Okta Users\n\n")
+    # Build the search expression first so the email's quotes and backslashes are escaped with it.
+    out.append("".join(DATA_USER_TEMPLATE % (user_map[user.get("id")],
+                                             hcl_string(f'profile.email eq "{user_display_name(user)}"'))
+                       for user in users))
+
+def generate_data_blocks_for_resource_sets(resource_set_map, out):
+    out.append("\n# Generated Data Blocks for Okta Resource Sets\n\n")
+    out.append("".join(DATA_BY_ID_TEMPLATE % ("okta_resource_set", normalized, rs_id)
+                       for rs_id, normalized in resource_set_map.items()))
+
+def generate_data_blocks_for_custom_roles(custom_role_map, out):
+    out.append("\n# Generated Data Blocks for Okta Custom Admin Roles\n\n")
+    out.append("".join(DATA_BY_ID_TEMPLATE % ("okta_admin_role_custom", normalized, role_id)
+                       for role_id, normalized in custom_role_map.items()))
+
+def generate_data_blocks_for_apps(app_map, out):
     if not app_map:
         return
-    with open(data_tf_file, "a") as f:
-        f.write("\n# Generated Data Blocks for Okta Apps\n\n")
-        for app_id, normalized in app_map.items():
-            block = f'''
-data "okta_app" "{normalized}" {{
-  id = "{app_id}"
-}}
-'''
-            f.write(block)
+    out.append("\n# Generated Data Blocks for Okta Apps\n\n")
+    out.append("".join(DATA_BY_ID_TEMPLATE % ("okta_app", normalized, app_id)
+                       for app_id, normalized in app_map.items()))
 
 # ----- Terraform Resource Block Generators -----
 
-def generate_terraform_roles(roles, tf_file, terraform_format, okta_domain, headers):
-    with open(tf_file, "a") as f:
-        f.write("\n# Terraform configuration for Okta IAM Admin Roles (okta_admin_role_custom)\n\n")
-        for role in roles:
-            role_id = role.get("id")
-            label = role.get("label")
-            description = role.get("description", "")
-            permissions = fetch_role_permissions(okta_domain, role_id, headers)
-            normalized_name = normalize_resource_name(label)
-            if terraform_format == "hcl":
-                perms_formatted = ", ".join([f'"{perm}"' for perm in permissions])
-                block = f'''
-resource "okta_admin_role_custom" "{normalized_name}" {{
-  label       = "{label}"
-  description = "{description}"
-  permissions = [{perms_formatted}]
+HCL_ROLE_TEMPLATE = '''
+resource "okta_admin_role_custom" "{name}" {{
+  label       = {label}
+  description = {description}
+  permissions = [{permissions}]
   
   tags = {{
     resource_id    = "{role_id}"
-    resource_label = "{label}"
+    resource_label = {label}
   }}
 }}
 '''
-            else:
-                block = json.dumps({
-                    "resource": {
-                        "okta_admin_role_custom": {
-                            normalized_name: {
-                                "label": label,
-                                "description": description,
-                                "permissions": permissions,
-                                "tags": {
-                                    "resource_id": role_id,
-                                    "resource_label": label
-                                }
-                            }
-                        }
-                    }
-                }, indent=2) + "\n"
-            f.write(block)
-
-def generate_terraform_resource_sets(resource_sets, tf_file, terraform_format, okta_domain, headers, group_map, user_map, app_map):
-    with open(tf_file, "a") as f:
-        f.write("\n# Terraform configuration for Okta Resource Sets (okta_resource_set)\n\n")
-        for rs in resource_sets:
-            rs_id = rs.get("id")
-            label = rs.get("label")
-            description = rs.get("description", "")
-            endpoints = fetch_resource_set_resources(okta_domain, rs_id, headers)
-            substituted_endpoints = [substitute_member(ep, group_map, user_map, app_map, okta_domain) for ep in endpoints]
-            endpoints_formatted = ", ".join([f'"{ep}"' for ep in substituted_endpoints])
-            normalized_name = normalize_resource_name(label)
-            if terraform_format == "hcl":
-                block = f'''
-resource "okta_resource_set" "{normalized_name}" {{
-  label       = "{label}"
-  description = "{description}"
-  resources   = [{endpoints_formatted}]
+
+HCL_RESOURCE_SET_TEMPLATE = '''
+resource "okta_resource_set" "{name}" {{
+  label       = {label}
+  description = {description}
+  resources   = [{resources}]
   
   tags = {{
     resource_id    = "{rs_id}"
-    resource_label = "{label}"
+    resource_label = {label}
   }}
 }}
 '''
-            else:
-                block = json.dumps({
-                    "resource": {
-                        "okta_resource_set": {
-                            normalized_name: {
-                                "label": label,
-                                "description": description,
-                                "resources": substituted_endpoints,
-                                "tags": {
-                                    "resource_id": rs_id,
-                                    "resource_label": label
-                                }
-                            }
-                        }
-                    }
-                }, indent=2) + "\n"
-            f.write(block)
-
-def generate_import_blocks_for_resource_sets(resource_sets, tf_file):
-    with open(tf_file, "a") as f:
-        f.write("\n# Import blocks for Okta Resource Sets\n")
-        for rs in resource_sets:
-            rs_id = rs.get("id")
-            block = f'''
-import {{
-  for_each = var.CONFIG == "prod" ? toset(["prod"]) : []
-  to       = okta_resource_set.{normalize_resource_name(rs.get("label", rs_id))}[0]
-  id       = "{rs_id}"
-}}
-'''
-            f.write(block)
-
-def generate_import_blocks_for_admin_roles(roles, tf_file):
-    with open(tf_file, "a") as f:
-        f.write("\n# Import blocks for Okta IAM Admin Roles\n")
-        for role in roles:
-            role_id = role.get("id")
-            block = f'''
+
+HCL_IMPORT_TEMPLATE = '''
 import {{
   for_each = var.CONFIG == "prod" ? toset(["prod"]) : []
-  to       = okta_admin_role_custom.{normalize_resource_name(role.get("label", role_id))}
-  id       = "{role_id}"
+  to       = {to}
+  id       = "{import_id}"
 }}
 '''
-            f.write(block)
-
-def generate_terraform_custom_assignments(custom_assignments, tf_file, terraform_format, group_map, user_map, resource_set_map, custom_role_map, okta_domain):
-    with open(tf_file, "a") as f:
-        f.write("\n# Terraform configuration for Custom Role Assignments (okta_admin_role_custom_assignments)\n\n")
-        for (custom_role_id, resource_set_id), members in custom_assignments.items():
-            resource_name = f"ca_{normalize_resource_name(custom_role_id)}_{normalize_resource_name(resource_set_id)}"
-            substituted_members = [substitute_member(m, group_map, user_map, okta_domain=okta_domain) for m in members]
-            members_list = ", ".join([f'"{m}"' for m in substituted_members])
-            if resource_set_id in resource_set_map:
-                resource_set_reference = f"okta_resource_set.{resource_set_map[resource_set_id]}.id"
-            else:
-                resource_set_reference = f'"{resource_set_id}"'
-            if custom_role_id in custom_role_map:
-                custom_role_reference = f"okta_admin_role_custom.{custom_role_map[custom_role_id]}.id"
-            else:
-                custom_role_reference = f'"{custom_role_id}"'
-            if terraform_format == "hcl":
-                block = f'''
-resource "okta_admin_role_custom_assignments" "{resource_name}" {{
+
+HCL_CUSTOM_ASSIGNMENT_TEMPLATE = '''
+resource "okta_admin_role_custom_assignments" "{name}" {{
   resource_set_id = {resource_set_reference}
   custom_role_id  = {custom_role_reference}
-  members         = [{members_list}]
-}}
-'''
-            else:
-                block = json.dumps({
-                    "resource": {
-                        "okta_admin_role_custom_assignments": {
-                            resource_name: {
-                                "resource_set_id": resource_set_reference,
-                                "custom_role_id": custom_role_reference,
-                                "members": substituted_members
-                            }
-                        }
-                    }
-                }, indent=2) + "\n"
-            f.write(block)
-
-def generate_import_blocks_for_custom_assignments(custom_assignments, tf_file):
-    with open(tf_file, "a") as f:
-        f.write("\n# Import blocks for Custom Role Assignments\n")
-        for (custom_role_id, resource_set_id) in custom_assignments.keys():
-            resource_name = f"ca_{normalize_resource_name(custom_role_id)}_{normalize_resource_name(resource_set_id)}"
-            block = f'''
-import {{
-  for_each = var.CONFIG == "prod" ? toset(["prod"]) : []
-  to       = okta_admin_role_custom_assignments.{resource_name}
-  id       = "{resource_set_id}/{custom_role_id}"
+  members         = [{members}]
 }}
 '''
-            f.write(block)
-
-def generate_terraform_group_roles(group_roles_by_group, tf_file, terraform_format, group_map):
-    with open(tf_file, "a") as f:
-        f.write("\n# Terraform configuration for Standard Group Roles (okta_group_role)\n\n")
-        for group_id, assignments in group_roles_by_group.items():
-            if group_id in group_map:
-                group_ref = f"data.okta_group.{group_map[group_id]}.id"
-            else:
-                group_ref = f'"{group_id}"'
-            for assignment in assignments:
-                if assignment.get("type") == "CUSTOM":
-                    continue
-                role_type = assignment.get("type")
-                resource_name = f"group_{group_id}_{assignment.get('id')}"
-                block = f'''
-resource "okta_group_role" "{resource_name}" {{
-  group_id  = {group_ref}
+
+HCL_GROUP_ROLE_TEMPLATE = '''
+resource "okta_group_role" "{name}" {{
+  group_id  = {group_reference}
   role_type = "{role_type}"
   
   tags = {{
-    resource_id    = "{assignment.get('id')}"
-    resource_label = "{assignment.get('label', 'n/a')}"
+    resource_id    = "{assignment_id}"
+    resource_label = {label}
   }}
 }}
 '''
-                f.write(block)
 
-def generate_import_blocks_for_group_roles(group_roles_by_group, tf_file):
-    with open(tf_file, "a") as f:
-        f.write("\n# Import blocks for Standard Group Roles\n")
-        for group_id, assignments in group_roles_by_group.items():
-            for assignment in assignments:
-                if assignment.get("type") == "CUSTOM":
-                    continue
-                resource_name = f"group_{group_id}_{assignment.get('id')}"
-                block = f'''
-import {{
-  for_each = var.CONFIG == "prod" ? toset(["prod"]) : []
-  to       = okta_group_role.{resource_name}
-  id       = "{assignment.get('id')}"
-}}
-'''
-                f.write(block)
-
-def generate_terraform_user_roles(user_roles_by_user, tf_file, terraform_format, user_map):
-    with open(tf_file, "a") as f:
-        f.write("\n# Terraform configuration for Standard User Admin Roles (okta_user_admin_roles)\n\n")
-        for user_id, assignments in user_roles_by_user.items():
-            standard_roles = [assignment.get("type") for assignment in assignments if assignment.get("type") != "CUSTOM"]
-            if not standard_roles:
-                continue
-            roles_list = list(set(standard_roles))
-            roles_formatted = ", ".join([f'"{r}"' for r in roles_list])
-            if user_id in user_map:
-                user_reference = f"data.okta_user.{user_map[user_id]}.id"
-            else:
-                user_reference = f'"{user_id}"'
-            resource_name = f"user_{user_id}"
-            block = f'''
-resource "okta_user_admin_roles" "{resource_name}" {{
+HCL_USER_ROLES_TEMPLATE = '''
+resource "okta_user_admin_roles" "{name}" {{
   user_id     = {user_reference}
-  admin_roles = [{roles_formatted}]
+  admin_roles = [{roles}]
   
   tags = {{
     resource_id    = {user_reference}
-    resource_label = "User {user_map.get(user_id, user_id)}"
+    resource_label = "User {member}"
   }}
 }}
 '''
-            f.write(block)
-
-def generate_import_blocks_for_user_roles(user_roles_by_user, tf_file):
-    with open(tf_file, "a") as f:
-        f.write("\n# Import blocks for Standard User Admin Roles\n")
-        for user_id, assignments in user_roles_by_user.items():
-            standard_roles = [assignment.get("type") for assignment in assignments if assignment.get("type") != "CUSTOM"]
-            if not standard_roles:
-                continue
-            resource_name = f"user_{user_id}"
-            block = f'''
-import {{
-  for_each = var.CONFIG == "prod" ? toset(["prod"]) : []
-  to       = okta_user_admin_roles.{resource_name}
-  id       = "{user_id}"
-}}
-'''
-            f.write(block)
 
-def aggregate_custom_assignments(group_roles_by_group, user_roles_by_user):
-    custom_assignments = {}
+def generate_terraform_roles(roles, out, imports, terraform_format, json_resources, okta_domain, session):
+    out.append("\n# Terraform configuration for Okta IAM Admin Roles (okta_admin_role_custom)\n\n")
+    imports.append("\n# Import blocks for Okta IAM Admin Roles\n")
+    permissions_by_role = fetch_concurrently(
+        lambda role: fetch_role_permissions(okta_domain, role.get("id"), session), roles)
+    for role, permissions in zip(roles, permissions_by_role):
+        role_id = role.get("id")
+        label = role.get("label")
+        description = role.get("description", "")
+        normalized_name = normalize_resource_name(label)
+        if terraform_format == "hcl":
+            out.append(HCL_ROLE_TEMPLATE.format(
+                name=normalized_name, label=hcl_string(label), description=hcl_string(description),
+                role_id=role_id, permissions=", ".join(map(hcl_string, permissions))))
+        else:
+            json_resources["okta_admin_role_custom"][normalized_name] = {
+                "label": label,
+                "description": description,
+                "permissions": permissions,
+                "tags": {
+                    "resource_id": role_id,
+                    "resource_label": label
+                }
+            }
+        imports.append(HCL_IMPORT_TEMPLATE.format(to=f"okta_admin_role_custom.{normalized_name}", import_id=role_id))
+
+def generate_terraform_resource_sets(resource_sets, out, imports, terraform_format, json_resources, okta_domain, session, group_map, user_map, app_map):
+    out.append("\n# Terraform configuration for Okta Resource Sets (okta_resource_set)\n\n")
+    imports.append("\n# Import blocks for Okta Resource Sets\n")
+    endpoints_by_rs = fetch_concurrently(
+        lambda rs: fetch_resource_set_resources(okta_domain, rs.get("id"), session), resource_sets)
+    # The same group/user/app hrefs recur across resource sets; substitute each distinct one once.
+    substitute = make_substituter(group_map, user_map, app_map, okta_domain)
+    for rs, endpoints in zip(resource_sets, endpoints_by_rs):
+        rs_id = rs.get("id")
+        label = rs.get("label")
+        description = rs.get("description", "")
+        substituted_endpoints = [substitute(ep) for ep in endpoints]
+        normalized_name = normalize_resource_name(label)
+        if terraform_format == "hcl":
+            out.append(HCL_RESOURCE_SET_TEMPLATE.format(
+                name=normalized_name, label=hcl_string(label), description=hcl_string(description),
+                rs_id=rs_id, resources=", ".join(map(hcl_string, substituted_endpoints))))
+        else:
+            json_resources["okta_resource_set"][normalized_name] = {
+                "label": label,
+                "description": description,
+                "resources": substituted_endpoints,
+                "tags": {
+                    "resource_id": rs_id,
+                    "resource_label": label
+                }
+            }
+        imports.append(HCL_IMPORT_TEMPLATE.format(to=f"okta_resource_set.{normalized_name}[0]", import_id=rs_id))
+
+def generate_terraform_custom_assignments(custom_assignments, out, imports, terraform_format, json_resources, group_map, user_map, resource_set_map, custom_role_map, okta_domain):
+    out.append("\n# Terraform configuration for Custom Role Assignments (okta_admin_role_custom_assignments)\n\n")
+    imports.append("\n# Import blocks for Custom Role Assignments\n")
+    substitute = make_substituter(group_map, user_map, okta_domain=okta_domain)
+    for (custom_role_id, resource_set_id), members in custom_assignments.items():
+        resource_name = f"ca_{normalize_resource_name(custom_role_id)}_{normalize_resource_name(resource_set_id)}"
+        substituted_members = [substitute(m) for m in members]
+        members_list = ", ".join(map(hcl_string, substituted_members))
+        if resource_set_id in resource_set_map:
+            resource_set_reference = f"okta_resource_set.{resource_set_map[resource_set_id]}.id"
+        else:
+            resource_set_reference = f'"{resource_set_id}"'
+        if custom_role_id in custom_role_map:
+            custom_role_reference = f"okta_admin_role_custom.{custom_role_map[custom_role_id]}.id"
+        else:
+            custom_role_reference = f'"{custom_role_id}"'
+        if terraform_format == "hcl":
+            out.append(HCL_CUSTOM_ASSIGNMENT_TEMPLATE.format(
+                name=resource_name, resource_set_reference=resource_set_reference,
+                custom_role_reference=custom_role_reference, members=members_list))
+        else:
+            json_resources["okta_admin_role_custom_assignments"][resource_name] = {
+                "resource_set_id": resource_set_reference,
+                "custom_role_id": custom_role_reference,
+                "members": substituted_members
+            }
+        imports.append(HCL_IMPORT_TEMPLATE.format(
+            to=f"okta_admin_role_custom_assignments.{resource_name}", import_id=f"{resource_set_id}/{custom_role_id}"))
+
+def generate_terraform_group_roles(group_roles_by_group, out, imports, terraform_format, group_map):
+    out.append("\n# Terraform configuration for Standard Group Roles (okta_group_role)\n\n")
+    imports.append("\n# Import blocks for Standard Group Roles\n")
     for group_id, assignments in group_roles_by_group.items():
+        if group_id in group_map:
+            group_ref = f"data.okta_group.{group_map[group_id]}.id"
+        else:
+            group_ref = f'"{group_id}"'
         for assignment in assignments:
             if assignment.get("type") == "CUSTOM":
-                custom_role_id = assignment.get("role")
-                resource_set_id = assignment.get("resource-set")
-                key = (custom_role_id, resource_set_id)
-                member_href = '${{local.org_url}}/api/v1/groups/{}'.format(group_id)
-                custom_assignments.setdefault(key, set()).add(member_href)
+                continue
+            assignment_id = assignment.get("id")
+            resource_name = f"group_{group_id}_{assignment_id}"
+            out.append(HCL_GROUP_ROLE_TEMPLATE.format(
+                name=resource_name, group_reference=group_ref,
+                role_type=assignment.get("type"), assignment_id=assignment_id,
+                label=hcl_string(assignment.get("label", "n/a"))))
+            imports.append(HCL_IMPORT_TEMPLATE.format(to=f"okta_group_role.{resource_name}", import_id=assignment_id))
+
+def standard_role_types(assignments):
+    """Return the set of non-CUSTOM role types in a member's role assignments."""
+    return {t for assignment in assignments if (t := assignment.get("type")) and t != "CUSTOM"}
+
+def generate_terraform_user_roles(user_roles_by_user, out, imports, terraform_format, user_map):
+    out.append("\n# Terraform configuration for Standard User Admin Roles (okta_user_admin_roles)\n\n")
+    imports.append("\n# Import blocks for Standard User Admin Roles\n")
     for user_id, assignments in user_roles_by_user.items():
-        for assignment in assignments:
-            if assignment.get("type") == "CUSTOM":
-                custom_role_id = assignment.get("role")
-                resource_set_id = assignment.get("resource-set")
-                key = (custom_role_id, resource_set_id)
-                member_href = '${{local.org_url}}/api/v1/users/{}'.format(user_id)
-                custom_assignments.setdefault(key, set()).add(member_href)
+        standard_roles = standard_role_types(assignments)
+        if not standard_roles:
+            continue
+        roles_formatted = ", ".join(f'"{r}"' for r in sorted(standard_roles))
+        if user_id in user_map:
+            user_reference = f"data.okta_user.{user_map[user_id]}.id"
+        else:
+            user_reference = f'"{user_id}"'
+        resource_name = f"user_{user_id}"
+        out.append(HCL_USER_ROLES_TEMPLATE.format(
+            name=resource_name, user_reference=user_reference, roles=roles_formatted,
+            member=user_map.get(user_id, user_id)))
+        imports.append(HCL_IMPORT_TEMPLATE.format(to=f"okta_user_admin_roles.{resource_name}", import_id=user_id))
+
+GROUP_HREF_PREFIX = "${local.org_url}/api/v1/groups/"
+USER_HREF_PREFIX = "${local.org_url}/api/v1/users/"
+
+def aggregate_custom_assignments(group_roles_by_group, user_roles_by_user):
+    # Members are kept as dict keys: deduplicated like a set, but in first-seen order so output is stable.
+    custom_assignments = defaultdict(dict)
+    for href_prefix, roles_by_member in ((GROUP_HREF_PREFIX, group_roles_by_group), (USER_HREF_PREFIX, user_roles_by_user)):
+        for member_id, assignments in roles_by_member.items():
+            member_href = href_prefix + member_id
+            for assignment in assignments:
+                if assignment.get("type") == "CUSTOM":
+                    key = (assignment.get("role"), assignment.get("resource-set"))
+                    custom_assignments[key][member_href] = None
     return custom_assignments
 
 # ----- Main Function -----
@@ -749,23 +706,30 @@ def main():
                         help="Output format for Terraform configuration (hcl or json)")
     parser.add_argument("--all-groups", action="store_true", help="Iterate over all groups to fetch group roles")
     parser.add_argument("--all-users", action="store_true", help="Iterate over all users to fetch user roles")
-    parser.add_argument("--tf-fmt", action="store_true", help="Run 'terraform fmt' on the generated file")
+    parser.add_argument("--tf-fmt", action="store_true", help="Run 'terraform fmt' on the generated files")
+    parser.add_argument("--cache-file", help="JSON file of ETags and response bodies; unchanged Okta responses are revalidated instead of re-downloaded")
+    parser.add_argument("--debug", action="store_true", help="Print DataFrame previews and write debug CSVs of the fetched data")
+    parser.add_argument("--verbose", action="store_true", help="Log every API call, including per-role and per-member fetches")
     
     args = parser.parse_args()
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO, format="%(message)s")
 
     okta_domain = get_okta_domain(args.subdomain, args.domain_flag)
     print(f"Using Okta domain: {okta_domain}")
 
-    headers = {
-        "Authorization": f"SSWS {args.api_token}",
-        "Accept": "application/json"
-    }
+    # One session for the whole run so every call reuses pooled keep-alive connections.
+    etag_cache = load_etag_cache(args.cache_file) if args.cache_file else None
+    session = build_session(args.api_token, etag_cache)
 
     tf_file = f"{args.output_prefix}_resources.tf"
     data_tf_file = "data-admin.tf"
 
-    with open(tf_file, "w") as f:
-        f.write("""# Generated Terraform configuration for Okta resources
+    # Every Terraform block is collected here and written to tf_file in one go at the end;
+    # import blocks are built alongside their resources and follow them in the file.
+    imports = []
+    # With --terraform-format json, resources collect here (type -> name -> body) and are dumped once.
+    json_resources = defaultdict(dict)
+    out = ["""# Generated Terraform configuration for Okta resources
 
 data "okta_org_metadata" "_" {}
 locals {
@@ -775,40 +739,45 @@ locals {
   )
 }
 
-""")
+"""]
     
-    # Fetch roles, resource sets, and apps.
-    roles = fetch_roles(okta_domain, headers)
-    resource_sets = fetch_resource_sets(okta_domain, headers)
-    apps = fetch_apps(okta_domain, headers)
+    # Fetch roles, resource sets, apps, groups, and users. The five listings are
+    # independent endpoints, so their pagination chains run side by side.
+    with ThreadPoolExecutor(max_workers=5) as executor:
+        roles_future = executor.submit(fetch_roles, okta_domain, session)
+        resource_sets_future = executor.submit(fetch_resource_sets, okta_domain, session)
+        apps_future = executor.submit(fetch_apps, okta_domain, session)
+        groups_future = executor.submit(fetch_all_groups, okta_domain, session)
+        users_future = executor.submit(fetch_all_users, okta_domain, session)
+        roles = roles_future.result()
+        resource_sets = resource_sets_future.result()
+        apps = apps_future.result()
+        groups = groups_future.result()
+        users = users_future.result()
     
-    # Build lookup mappings using Pandas.
-    groups = fetch_all_groups(okta_domain, headers)
-    users = fetch_all_users(okta_domain, headers)
+    # Build lookup mappings.
     group_id_to_normalized = build_group_mapping(groups)
     user_id_to_normalized = build_user_mapping(users)
     app_id_to_normalized = build_app_mapping(apps)
     
     # Export debug CSVs.
-    pd.DataFrame(apps).to_csv("debug_apps.csv", index=False)
-    print("Apps CSV written to debug_apps.csv")
-    pd.DataFrame(groups).to_csv("debug_groups.csv", index=False)
-    print("Groups CSV written to debug_groups.csv")
-    pd.DataFrame(users).to_csv("debug_users.csv", index=False)
-    print("Users CSV written to debug_users.csv")
-    pd.DataFrame(resource_sets).to_csv("debug_resource_sets.csv", index=False)
-    print("Resource sets CSV written to debug_resource_sets.csv")
+    if args.debug:
+        write_debug_csv(apps, "debug_apps.csv")
+        print("Apps CSV written to debug_apps.csv")
+        write_debug_csv(groups, "debug_groups.csv")
+        print("Groups CSV written to debug_groups.csv")
+        write_debug_csv(users, "debug_users.csv")
+        print("Users CSV written to debug_users.csv")
+        write_debug_csv(resource_sets, "debug_resource_sets.csv")
+        print("Resource sets CSV written to debug_resource_sets.csv")
+        write_debug_csv(roles, "debug_iam_roles.csv")
+        print("IAM roles CSV written to debug_iam_roles.csv")
     
     # Debug with Pandas.
     group_roles_by_group, user_roles_by_user = debug_with_pandas(
-        resource_sets, roles, okta_domain, headers, tf_file, args,
-        group_id_to_normalized, user_id_to_normalized, app_id_to_normalized
+        resource_sets, roles, groups, users, apps, okta_domain, session, args
     )
     
-    # Write import blocks for IAM roles and resource sets.
-    generate_import_blocks_for_resource_sets(resource_sets, tf_file)
-    generate_import_blocks_for_admin_roles(roles, tf_file)
-    
     # Build lookup mappings for resource sets and custom roles.
     resource_set_map = { rs.get("id"): normalize_resource_name(rs.get("label"))
                          for rs in resource_sets }
@@ -816,31 +785,47 @@ locals {
                         for role in roles if role.get("id", "").startswith("cr") }
     
     # Generate data blocks for data sources.
-    generate_data_blocks_for_groups(groups, data_tf_file)
-    generate_data_blocks_for_users(users, data_tf_file)
-    generate_data_blocks_for_resource_sets(resource_sets, data_tf_file)
-    generate_data_blocks_for_custom_roles(roles, data_tf_file)
-    generate_data_blocks_for_apps(app_id_to_normalized, data_tf_file)
+    data_out = []
+    generate_data_blocks_for_groups(groups, group_id_to_normalized, data_out)
+    generate_data_blocks_for_users(users, user_id_to_normalized, data_out)
+    generate_data_blocks_for_resource_sets(resource_set_map, data_out)
+    generate_data_blocks_for_custom_roles(custom_role_map, data_out)
+    generate_data_blocks_for_apps(app_id_to_normalized, data_out)
+    with open(data_tf_file, "w") as f:
+        f.write("".join(data_out))
     
     # Aggregate custom assignments and generate custom assignment blocks.
     custom_assignments = aggregate_custom_assignments(group_roles_by_group, user_roles_by_user)
-    generate_import_blocks_for_custom_assignments(custom_assignments, tf_file)
-    generate_terraform_custom_assignments(custom_assignments, tf_file, args.terraform_format,
+    generate_terraform_custom_assignments(custom_assignments, out, imports, args.terraform_format, json_resources,
                                           group_id_to_normalized, user_id_to_normalized,
                                           resource_set_map, custom_role_map, okta_domain)
     
     # Generate main IAM role and resource set blocks.
-    generate_terraform_roles(roles, tf_file, args.terraform_format, okta_domain, headers)
-    generate_terraform_resource_sets(resource_sets, tf_file, args.terraform_format,
-                                     okta_domain, headers, group_id_to_normalized, user_id_to_normalized, app_id_to_normalized)
+    generate_terraform_roles(roles, out, imports, args.terraform_format, json_resources, okta_domain, session)
+    generate_terraform_resource_sets(resource_sets, out, imports, args.terraform_format, json_resources,
+                                     okta_domain, session, group_id_to_normalized, user_id_to_normalized, app_id_to_normalized)
+    
+    # All API calls are done; release the pooled connections.
+    session.close()
+    if etag_cache is not None:
+        save_etag_cache(etag_cache, args.cache_file)
     
-    # Generate user admin roles using interpolation.
-    generate_terraform_user_roles(user_roles_by_user, tf_file, args.terraform_format, user_id_to_normalized)
+    # Generate standard group roles and user admin roles.
+    generate_terraform_group_roles(group_roles_by_group, out, imports, args.terraform_format, group_id_to_normalized)
+    generate_terraform_user_roles(user_roles_by_user, out, imports, args.terraform_format, user_id_to_normalized)
+    
+    if json_resources:
+        out.append(dumps_json({"resource": dict(json_resources)}) + "\n")
+    
+    with open(tf_file, "w") as f:
+        f.write("".join(out))
+        f.write("".join(imports))
     
-    # Optionally run 'terraform fmt' on the generated file.
+    # Optionally run 'terraform fmt' once, after everything is written, on both generated files.
     if args.tf_fmt:
-        print("Running 'terraform fmt' on the generated file...")
-        result = subprocess.run(["terraform", "fmt", tf_file], capture_output=True, text=True)
+        print("Running 'terraform fmt' on the generated files...")
+        result = subprocess.run(["terraform", "fmt", "-list=false", tf_file, data_tf_file],
+                                stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
         if result.returncode == 0:
             print("terraform fmt completed successfully.")
         else:
@@ -3,15 +3,17 @@ import csv
 import os
 import argparse
 
+# Okta domain suffix for each domain flag.
+DOMAIN_MAP = {
+    "default": "okta.com",
+    "emea": "okta-emea.com",
+    "preview": "oktapreview.com",
+    "gov": "okta-gov.com",
+    "mil": "okta.mil"
+}
+
 def get_okta_domain(subdomain, domain_flag):
-    domain_map = {
-        "default": "okta.com",
-        "emea": "okta-emea.com",
-        "preview": "oktapreview.com",
-        "gov": "okta-gov.com",
-        "mil": "okta.mil"
-    }
-    domain = domain_map.get(domain_flag, "okta.com")
+    domain = DOMAIN_MAP.get(domain_flag, "okta.com")
     return f"https://{subdomain}.{domain}"
 
 def fetch_okta_group_rules(okta_domain, api_token):
@@ -3,60 +3,99 @@
 import os
 import argparse
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import csv
 import json
-import re
+import time
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
 
+try:
+    import orjson
+except ImportError:  # optional speed-up; fall back to the stdlib decoder
+    orjson = None
+
 ###############################################################################
 # 1. Okta Domain Utilities
 ###############################################################################
 
+# Okta domain suffix for each domain flag.
+DOMAIN_MAP = {
+    "default": "okta.com",
+    "emea": "okta-emea.com",
+    "preview": "oktapreview.com",
+    "gov": "okta-gov.com",
+    "mil": "okta.mil"
+}
+
 def get_okta_domain(subdomain, domain_flag):
     """
     Build the Okta domain URL using a subdomain and domain_flag:
       - domain_flag can be 'default', 'emea', 'preview', 'gov', or 'mil'.
     """
-    domain_map = {
-        "default": "okta.com",
-        "emea": "okta-emea.com",
-        "preview": "oktapreview.com",
-        "gov": "okta-gov.com",
-        "mil": "okta.mil"
-    }
-    domain = domain_map.get(domain_flag, "okta.com")
+    domain = DOMAIN_MAP.get(domain_flag, "okta.com")
     return f"https://{subdomain}.{domain}"
 
+class OktaRetry(Retry):
+    """urllib3 Retry that, on a 429 without Retry-After, waits until Okta's x-rate-limit-reset epoch."""
+
+    def get_retry_after(self, response):
+        retry_after = super().get_retry_after(response)
+        if retry_after is not None or response.status != 429:
+            return retry_after
+        reset = response.headers.get("x-rate-limit-reset")
+        if reset:
+            sleep_time = max(1, int(reset) - int(time.time()))
+        else:
+            sleep_time = 60
+        print(f"Rate limit reached. Sleeping for {sleep_time} seconds before retrying.")
+        return sleep_time
+
+def build_session(api_token):
+    """
+    Create a requests.Session carrying the Okta auth headers, so every call
+    reuses pooled keep-alive connections. Rate limits (429) wait for Okta's
+    x-rate-limit-reset (see OktaRetry); transient gateway errors are retried
+    with exponential backoff inside urllib3.
+    """
+    session = requests.Session()
+    session.headers.update({"Authorization": f"SSWS {api_token}", "Accept": "application/json"})
+    retry = OktaRetry(total=5, backoff_factor=0.5, status_forcelist=[429, 502, 503, 504],
+                      allowed_methods=["GET"], respect_retry_after_header=True, raise_on_status=False)
+    session.mount("https://", HTTPAdapter(max_retries=retry))
+    return session
+
+def parse_json(response):
+    """Decode a response body as JSON, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(response.content)
+    return response.json()
+
 
 ###############################################################################
 # 2. Fetching & Exporting Okta Groups
 ###############################################################################
 
-def fetch_okta_groups(okta_domain, api_token):
+def fetch_okta_groups(okta_domain, session):
     """
     Fetch all groups from the Okta API with pagination, 
     filtering only groups whose 'type' == 'OKTA_GROUP'.
     """
     url = f"{okta_domain}/api/v1/groups"
-    headers = {"Authorization": f"SSWS {api_token}", "Accept": "application/json"}
     groups = []
 
     while url:
-        response = requests.get(url, headers=headers)
+        response = session.get(url)
         if response.status_code != 200:
             print(f"Error fetching groups: {response.status_code}, {response.text}")
             return []
 
-        data = response.json()
+        data = parse_json(response)
         # Filter only OKTA_GROUP types
         groups.extend([g for g in data if g.get("type") == "OKTA_GROUP"])
 
-        url = None
-        if "link" in response.headers:
-            links = response.headers["link"].split(", ")
-            for link in links:
-                if 'rel="next"' in link:
-                    url = link[link.find("<") + 1 : link.find(">")]
+        url = response.links.get("next", {}).get("url")
 
     return groups
 
@@ -106,30 +145,26 @@ def process_and_export_groups(groups, output_csv="okta_groups_dynamic.csv"):
 # 3. Fetching & Exporting Okta Group Rules
 ###############################################################################
 
-def fetch_okta_group_rules(okta_domain, api_token):
+def fetch_okta_group_rules(okta_domain, session):
     """
     Fetch all group rules from the Okta API with pagination.
     Returns a list of rule objects (JSON).
     """
-    url = f"{okta_domain}/api/v1/groups/rules"
-    headers = {"Authorization": f"SSWS {api_token}", "Accept": "application/json"}
+    # The rules endpoint pages 50 at a time by default; ask for its 200 maximum.
+    # Later pages keep the limit through the 'next' link.
+    url = f"{okta_domain}/api/v1/groups/rules?limit=200"
     rules = []
 
     while url:
-        response = requests.get(url, headers=headers)
+        response = session.get(url)
         if response.status_code != 200:
             print(f"Error fetching group rules: {response.status_code}, {response.text}")
             return []
-        data = response.json()
+        data = parse_json(response)
         rules.extend(data)
 
-        # Check if there's a 'next' link in the response headers
-        url = None
-        if "link" in response.headers:
-            links = response.headers["link"].split(", ")
-            for link in links:
-                if 'rel="next"' in link:
-                    url = link[link.find("<") + 1 : link.find(">")]
+        # Follow the 'next' link, if any; requests parses the Link header for us
+        url = response.links.get("next", {}).get("url")
 
     return rules
 
@@ -257,9 +292,10 @@ def clean_value(value, default=None):
     return value.replace('\n', ' ') if isinstance(value, str) else value
 
 def escape_for_terraform_resources(value):
-    """Escape double quotes for Terraform resource strings."""
+    """Escape backslashes and double quotes for Terraform resource strings."""
     if value:
-        return value.replace('"', '\\"')
+        # Backslashes first, so the ones added for quotes are not doubled.
+        return value.replace("\\", "\\\\").replace('"', '\\"')
     return value
 
 def format_group_assignments(value):
@@ -274,19 +310,22 @@ def format_group_assignments(value):
             return json.dumps([val_str])
     return "[]"
 
-def generate_terraform_resources(group_data, group_rule_data):
-    """Generate Terraform resource blocks for Okta groups & group rules."""
+def generate_terraform(group_data, group_rule_data):
+    """
+    Generate Terraform resource blocks and their import blocks for Okta groups
+    & group rules in a single pass. Returns (resources, imports) as strings.
+    """
     terraform_config = []
+    import_blocks = []
 
     # Groups
     for env, groups in group_data.items():
-        for _, group in groups.iterrows():
+        for group in groups.to_dict("records"):
             group_name = escape_for_terraform_resources(clean_value(group.get("name")))
             group_id = clean_value(group.get("id"))
             group_description = clean_value(group.get("description"))
             adminNotes = clean_value(group.get("adminNotes"))
             group_dynamic = process_group_dynamic(group.get("groupDynamic"))
-            status = rule.get("status", [])
             group_owner = clean_value(group.get("groupOwner"))
 
             terraform_config.append(f'resource "okta_group" "group_{env}_{group_id}" {{')
@@ -302,11 +341,19 @@ def generate_terraform_resources(group_data, group_rule_data):
             terraform_config.append('}')
             terraform_config.append('')
 
+            import_blocks.append('import {')
+            import_blocks.append(f'  for_each = var.CONFIG == "{env}" ? toset(["{env}"]) : []')
+            import_blocks.append(f'  to = okta_group.group_{env}_{group_id}[0]')
+            import_blocks.append(f'  id = "{group_id}"')
+            import_blocks.append('}')
+            import_blocks.append('')
+
     # Group Rules
     for env, rules in group_rule_data.items():
-        for _, rule in rules.iterrows():
+        for rule in rules.to_dict("records"):
             rule_id = clean_value(rule.get("id"))
             rule_name = escape_for_terraform_resources(clean_value(rule.get("name")))
+            status = clean_value(rule.get("status"))
             group_assignments = format_group_assignments(clean_value(rule.get("groupIds", [])))
             users_excluded = format_users_excluded(clean_value(rule.get("excludedUsers", [])))
             expression_type = clean_value(rule.get("type", "urn:okta:expression:1.0"))
@@ -323,27 +370,6 @@ def generate_terraform_resources(group_data, group_rule_data):
             terraform_config.append('}')
             terraform_config.append('')
 
-    return "\n".join(terraform_config)
-
-def generate_terraform_imports(group_data, group_rule_data):
-    """Generate import blocks for Okta groups & rules."""
-    import_blocks = []
-
-    # Groups
-    for env, groups in group_data.items():
-        for _, group in groups.iterrows():
-            group_id = clean_value(group.get("id"))
-            import_blocks.append('import {')
-            import_blocks.append(f'  for_each = var.CONFIG == "{env}" ? toset(["{env}"]) : []')
-            import_blocks.append(f'  to = okta_group.group_{env}_{group_id}[0]')
-            import_blocks.append(f'  id = "{group_id}"')
-            import_blocks.append('}')
-            import_blocks.append('')
-
-    # Rules
-    for env, rules in group_rule_data.items():
-        for _, rule in rules.iterrows():
-            rule_id = clean_value(rule.get("id"))
             import_blocks.append('import {')
             import_blocks.append(f'  for_each = var.CONFIG == "{env}" ? toset(["{env}"]) : []')
             import_blocks.append(f'  to = okta_group_rule.rule_{env}_{rule_id}[0]')
@@ -351,7 +377,7 @@ def generate_terraform_imports(group_data, group_rule_data):
             import_blocks.append('}')
             import_blocks.append('')
 
-    return "\n".join(import_blocks)
+    return "\n".join(terraform_config), "\n".join(import_blocks)
 
 
 ###############################################################################
@@ -396,23 +422,34 @@ def main():
             return
 
         okta_domain = get_okta_domain(args.subdomain, args.domain)
+        session = build_session(api_token)
 
-        # 1) Fetch Okta Groups
+        # Groups and group rules are independent endpoints, so when both are
+        # requested their pagination chains run side by side.
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            if args.fetch_okta_groups:
+                groups_future = executor.submit(fetch_okta_groups, okta_domain, session)
+            if args.fetch_okta_rules:
+                rules_future = executor.submit(fetch_okta_group_rules, okta_domain, session)
+
+        # 1) Export Okta Groups
         if args.fetch_okta_groups:
-            groups = fetch_okta_groups(okta_domain, api_token)
+            groups = groups_future.result()
             if groups:
                 process_and_export_groups(groups, args.groups_output)
             else:
                 print("No groups fetched or an error occurred.")
 
-        # 2) Fetch Okta Group Rules
+        # 2) Export Okta Group Rules
         if args.fetch_okta_rules:
-            rules = fetch_okta_group_rules(okta_domain, api_token)
+            rules = rules_future.result()
             if rules:
                 process_and_export_rules(rules, args.rules_output)
             else:
                 print("No rules fetched or an error occurred.")
 
+        session.close()
+
     # If generating Terraform, do so from CSV paths
     if args.generate_tf:
         # Build dictionary of CSV file paths
@@ -432,8 +469,7 @@ def main():
         }
 
         # Generate Terraform
-        terraform_output = generate_terraform_resources(group_data, group_rule_data)
-        import_output = generate_terraform_imports(group_data, group_rule_data)
+        terraform_output, import_output = generate_terraform(group_data, group_rule_data)
 
         # Write to .tf files
         script_dir = os.path.dirname(os.path.abspath(__file__))
@@ -1,33 +1,108 @@
 #!/usr/bin/env python3
 import argparse
+import functools
 import json
 import os
 import re
 import sys
+import time
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor
 
+try:
+    import orjson
+except ImportError:  # optional speed-up; fall back to the stdlib decoder
+    orjson = None
+
+# Upper bound on simultaneous rule fetches (and pooled connections).
+MAX_CONCURRENT_REQUESTS = 10
+
+# Characters not allowed in generated file and resource names.
+INVALID_FILENAME_CHARS_RE = re.compile(r'[^a-zA-Z0-9_-]')
+
+# Lifecycle block for catch-all rules, whose conditions Okta does not let you change.
+CATCH_ALL_LIFECYCLE = """\
+  lifecycle {
+    ignore_changes = [
+      "network_connection",
+      "network_excludes",
+      "network_includes",
+      "platform_include",
+      "custom_expression",
+      "device_is_registered",
+      "device_is_managed",
+      "users_excluded",
+      "users_included",
+      "groups_excluded",
+      "groups_included",
+      "user_types_excluded",
+      "user_types_included",
+    ]
+  }"""
+
+# Cached because each policy name is sanitized for both its resources and its file name.
+@functools.lru_cache(maxsize=None)
 def sanitize_filename(name):
     # Remove any characters that are not alphanumeric, underscore, or dash.
-    sanitized = re.sub(r'[^a-zA-Z0-9_-]', '_', name)
+    sanitized = INVALID_FILENAME_CHARS_RE.sub('_', name)
     return sanitized.lower()
 
+# Okta domain suffix for each domain flag.
+DOMAIN_MAP = {
+    "default": "okta.com",
+    "emea": "okta-emea.com",
+    "preview": "oktapreview.com",
+    "gov": "okta-gov.com",
+    "mil": "okta.mil"
+}
+
 def get_okta_domain(subdomain, domain_flag):
     """
     Build the Okta domain URL using a subdomain and domain_flag:
       - domain_flag can be 'default', 'emea', 'preview', 'gov', or 'mil'.
     """
-    domain_map = {
-        "default": "okta.com",
-        "emea": "okta-emea.com",
-        "preview": "oktapreview.com",
-        "gov": "okta-gov.com",
-        "mil": "okta.mil"
-    }
-    domain = domain_map.get(domain_flag, "okta.com")
+    domain = DOMAIN_MAP.get(domain_flag, "okta.com")
     return f"https://{subdomain}.{domain}"
 
-def get_policies(base_url, api_token, test=False):
+class OktaRetry(Retry):
+    """urllib3 Retry that, on a 429 without Retry-After, waits until Okta's x-rate-limit-reset epoch."""
+
+    def get_retry_after(self, response):
+        retry_after = super().get_retry_after(response)
+        if retry_after is not None or response.status != 429:
+            return retry_after
+        reset = response.headers.get("x-rate-limit-reset")
+        if reset:
+            sleep_time = max(1, int(reset) - int(time.time()))
+        else:
+            sleep_time = 60
+        print(f"Rate limit reached. Sleeping for {sleep_time} seconds before retrying.")
+        return sleep_time
+
+def build_session(api_token):
+    """
+    Create a requests.Session carrying the Okta auth headers, so every call
+    reuses pooled keep-alive connections. Rate limits (429) wait for Okta's
+    x-rate-limit-reset (see OktaRetry); transient gateway errors are retried
+    with exponential backoff inside urllib3.
+    """
+    session = requests.Session()
+    session.headers.update({"Authorization": f"SSWS {api_token}", "Accept": "application/json"})
+    retry = OktaRetry(total=5, backoff_factor=0.5, status_forcelist=[429, 502, 503, 504],
+                      allowed_methods=["GET"], respect_retry_after_header=True, raise_on_status=False)
+    session.mount("https://", HTTPAdapter(pool_maxsize=MAX_CONCURRENT_REQUESTS, max_retries=retry))
+    return session
+
+def parse_json(response):
+    """Decode a response body as JSON, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(response.content)
+    return response.json()
+
+def get_policies(base_url, session, test=False):
     """
     Retrieves policies from the Okta API or a local file if testing.
     """
@@ -36,13 +111,16 @@ def get_policies(base_url, api_token, test=False):
             policies = json.load(f)
     else:
         url = f"{base_url}/api/v1/policies?type=ACCESS_POLICY"
-        headers = {"Authorization": f"SSWS {api_token}", "Accept": "application/json"}
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
-        policies = response.json()
+        policies = []
+        while url:
+            response = session.get(url)
+            response.raise_for_status()
+            policies.extend(parse_json(response))
+            # Follow the 'next' link, if any; requests parses the Link header for us
+            url = response.links.get("next", {}).get("url")
     return policies
 
-def get_policy_rules(base_url, policy_id, api_token, test=False):
+def get_policy_rules(base_url, policy_id, session, test=False):
     """
     Retrieves rules for a given policy from the Okta API or a local file if testing.
     """
@@ -51,12 +129,28 @@ def get_policy_rules(base_url, policy_id, api_token, test=False):
             rules = json.load(f)
     else:
         url = f"{base_url}/api/v1/policies/{policy_id}/rules"
-        headers = {"Authorization": f"SSWS {api_token}", "Accept": "application/json"}
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
-        rules = response.json()
+        rules = []
+        while url:
+            response = session.get(url)
+            response.raise_for_status()
+            rules.extend(parse_json(response))
+            url = response.links.get("next", {}).get("url")
     return rules
 
+def fetch_all_policy_rules(base_url, policies, session, test=False):
+    """
+    Retrieves the rules of every policy concurrently.
+    Returns a (rules, error) pair per policy, in the same order as policies.
+    """
+    def fetch(policy):
+        try:
+            return get_policy_rules(base_url, policy["id"], session, test=test), None
+        except (requests.RequestException, OSError, ValueError) as e:
+            return None, e
+
+    with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_REQUESTS) as executor:
+        return list(executor.map(fetch, policies))
+
 def generate_tf(policy, rules, env_name=None):
     """
     Generates Terraform configuration for a given policy and its rules,
@@ -101,6 +195,8 @@ def generate_tf(policy, rules, env_name=None):
     for rule in rules:
         rule_name_raw = rule.get("name", "unnamed_rule")
         rule_name = sanitize_filename(rule_name_raw)
+        # The catch-all rule is the lowest-priority default rule Okta creates with each policy.
+        is_catch_all = rule.get("priority") == 99 or rule.get("name", "").strip().lower() == "catch-all rule"
         # Create a unique name by combining the policy and rule names.
         if env_name:
             unique_rule_name = f"{policy_name}_{env_name}_{rule_name}"
@@ -170,24 +266,8 @@ def generate_tf(policy, rules, env_name=None):
             tf_lines.append(f'  priority = {rule["priority"]}')
 
         # For catch-all rules, add a lifecycle block to ignore immutable changes.
-        if rule.get("priority") == 99 or rule.get("name", "").strip().lower() == "catch-all rule":
-            tf_lines.append("  lifecycle {")
-            tf_lines.append("    ignore_changes = [")
-            tf_lines.append('      "network_connection",')
-            tf_lines.append('      "network_excludes",')
-            tf_lines.append('      "network_includes",')
-            tf_lines.append('      "platform_include",')
-            tf_lines.append('      "custom_expression",')
-            tf_lines.append('      "device_is_registered",')
-            tf_lines.append('      "device_is_managed",')
-            tf_lines.append('      "users_excluded",')
-            tf_lines.append('      "users_included",')
-            tf_lines.append('      "groups_excluded",')
-            tf_lines.append('      "groups_included",')
-            tf_lines.append('      "user_types_excluded",')
-            tf_lines.append('      "user_types_included",')
-            tf_lines.append("    ]")
-            tf_lines.append("  }")
+        if is_catch_all:
+            tf_lines.append(CATCH_ALL_LIFECYCLE)
             
         tf_lines.append("}\n")
 
@@ -253,22 +333,20 @@ def main():
         sys.exit(1)
     
     print(f"Using Okta domain: {base_url}")
+    with build_session(api_token) as session:
+        try:
+            policies = get_policies(base_url, session, test=args.test)
+        except (requests.RequestException, OSError, ValueError) as e:
+            print(f"Error retrieving policies: {e}")
+            sys.exit(1)
 
-    try:
-        policies = get_policies(base_url, api_token, test=args.test)
-    except Exception as e:
-        print(f"Error retrieving policies: {e}")
-        sys.exit(1)
+        # Fetch every policy's rules up front, then render the files in order.
+        policies = [policy for policy in policies if policy.get("id")]
+        rules_results = fetch_all_policy_rules(base_url, policies, session, test=args.test)
 
-    for policy in policies:
-        policy_id = policy.get("id")
-        if not policy_id:
-            continue
-
-        try:
-            rules = get_policy_rules(base_url, policy_id, api_token, test=args.test)
-        except Exception as e:
-            print(f"Error retrieving rules for policy {policy.get('name')}: {e}")
+    for policy, (rules, error) in zip(policies, rules_results):
+        if error:
+            print(f"Error retrieving rules for policy {policy.get('name')}: {error}")
             continue
 
         tf_content = generate_tf(policy, rules)
@@ -1,63 +1,158 @@
 #!/usr/bin/env python3
 import argparse
 import re
+import time
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import subprocess
 import shutil
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+# Upper bound on in-flight API requests per environment.
+MAX_CONCURRENT_REQUESTS = 10
+
+# Patterns used by normalize_group_name, compiled once.
+LEADING_HASHES_RE = re.compile(r'^#+')
+SEPARATORS_RE = re.compile(r'[\s-]+')
+INVALID_NAME_CHARS_RE = re.compile(r'[^a-z0-9_]')
+
+# Okta domain suffix for each domain flag.
+DOMAIN_MAP = {
+    "default": "okta.com",
+    "emea": "okta-emea.com",
+    "preview": "oktapreview.com",
+    "gov": "okta-gov.com",
+    "mil": "okta.mil"
+}
+
+# HCL templates for the generated resources. Optional attribute lines are
+# passed in pre-rendered (with their trailing newline) or as "".
+POLICY_TEMPLATE = """\
+resource "okta_policy_signon" "{resource_name}" {{
+  count = var.CONFIG == "{env}" ? 1 : 0
+  name            = "{name}"
+  status          = "{status}"
+{description_line}{groups_included_line}  priority        = {priority}
+}}
+
+"""
+
+RULE_TEMPLATE = """\
+resource "okta_policy_rule_signon" "{resource_name}" {{
+  count = var.CONFIG == "{env}" ? 1 : 0
+  name               = "{name}"
+  status             = "{status}"
+  access             = "{access}"
+  authtype           = "{auth_type}"
+  behaviors          = [{behaviors}]
+  network_connection = "{network_connection}"
+  identity_provider  = "{identity_provider}"
+{identity_provider_ids_line}  mfa_lifetime       = {mfa_lifetime}
+{mfa_prompt_line}  mfa_remember_device = {mfa_remember_device}
+  mfa_required       = {mfa_required}
+  primary_factor     = "{primary_factor}"
+  users_excluded     = [{users_excluded}]
+  priority           = {priority}
+  risc_level         = "{risk_level}"
+  risk_level         = "{risk_level}"
+  session_idle       = {session_idle}
+  session_lifetime   = {session_lifetime}
+  session_persistent = {session_persistent}
+  policy_id          = okta_policy_signon.policy_{env}_{parent_policy_id}[0].id
+}}
+
+"""
+
+IMPORT_TEMPLATE = """\
+import {{
+  for_each = var.CONFIG == "{env}" ? toset(["{env}"]) : []
+  to       = {to}
+  id       = "{import_id}"
+}}
+
+"""
 
 def get_okta_domain(subdomain, domain_flag):
     """Build the Okta domain URL using a subdomain and domain_flag."""
-    domain_map = {
-        "default": "okta.com",
-        "emea": "okta-emea.com",
-        "preview": "oktapreview.com",
-        "gov": "okta-gov.com",
-        "mil": "okta.mil"
-    }
-    domain = domain_map.get(domain_flag, "okta.com")
+    domain = DOMAIN_MAP.get(domain_flag, "okta.com")
     return f"{subdomain}.{domain}"
 
-def fetch_policies(base_url, api_token):
+class OktaRetry(Retry):
+    """urllib3 Retry that, on a 429 without Retry-After, waits until Okta's x-rate-limit-reset epoch."""
+
+    def get_retry_after(self, response):
+        retry_after = super().get_retry_after(response)
+        if retry_after is not None or response.status != 429:
+            return retry_after
+        reset = response.headers.get("x-rate-limit-reset")
+        if reset:
+            sleep_time = max(1, int(reset) - int(time.time()))
+        else:
+            sleep_time = 60
+        print(f"Rate limit reached. Sleeping for {sleep_time} seconds before retrying.")
+        return sleep_time
+
+def build_session(api_token):
+    """
+    Create a requests.Session carrying the Okta auth headers, so every call
+    reuses pooled keep-alive connections. Rate limits (429) wait for Okta's
+    x-rate-limit-reset (see OktaRetry); transient gateway errors are retried
+    with exponential backoff inside urllib3.
+    """
+    session = requests.Session()
+    session.headers.update({"Authorization": f"SSWS {api_token}", "Accept": "application/json"})
+    retry = OktaRetry(total=5, backoff_factor=0.5, status_forcelist=[429, 502, 503, 504],
+                      allowed_methods=["GET"], respect_retry_after_header=True, raise_on_status=False)
+    session.mount("https://", HTTPAdapter(pool_maxsize=MAX_CONCURRENT_REQUESTS, max_retries=retry))
+    return session
+
+def fetch_policies(base_url, session):
     """Retrieve all OKTA_SIGN_ON policies from the given base URL."""
-    headers = {
-        "Authorization": f"SSWS {api_token}",
-        "Accept": "application/json"
-    }
     url = f"{base_url}/api/v1/policies?type=OKTA_SIGN_ON"
-    response = requests.get(url, headers=headers)
+    response = session.get(url)
     response.raise_for_status()
     return response.json()
 
-def fetch_policy_rules(base_url, api_token, policy_id):
+def fetch_policy_rules(base_url, session, policy_id):
     """Retrieve all rules for a specific policy."""
-    headers = {
-        "Authorization": f"SSWS {api_token}",
-        "Accept": "application/json"
-    }
     url = f"{base_url}/api/v1/policies/{policy_id}/rules"
-    response = requests.get(url, headers=headers)
+    response = session.get(url)
     response.raise_for_status()
     return response.json()
 
-def fetch_group_detail(base_url, api_token, group_id):
+def fetch_group_detail(base_url, session, group_id):
     """Retrieve group details for a given group_id; return the group's display name."""
-    headers = {
-        "Authorization": f"SSWS {api_token}",
-        "Accept": "application/json"
-    }
     url = f"{base_url}/api/v1/groups/{group_id}"
-    response = requests.get(url, headers=headers)
+    response = session.get(url)
     response.raise_for_status()
     data = response.json()
     return data.get("profile", {}).get("name", group_id)
 
+def fetch_group_map(base_url, session, group_ids, env_label):
+    """
+    Fetch display names for group_ids concurrently and return a map of
+    gid -> {"name", "normalized"}. A group that cannot be fetched falls back
+    to its raw ID.
+    """
+    def resolve(gid):
+        try:
+            group_name = fetch_group_detail(base_url, session, gid)
+            return gid, {"name": group_name, "normalized": normalize_group_name(group_name)}
+        except Exception as e:
+            print(f"Error fetching details for {env_label} group {gid}: {e}")
+            return gid, {"name": gid, "normalized": normalize_group_name(gid)}
+
+    with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_REQUESTS) as executor:
+        return dict(executor.map(resolve, group_ids))
+
 def normalize_group_name(group_name):
     """Normalize a group name into a Terraform-friendly identifier."""
-    normalized = re.sub(r'^#+', '', group_name).strip()
-    normalized = re.sub(r'[\s-]+', '_', normalized)
+    normalized = LEADING_HASHES_RE.sub('', group_name).strip()
+    normalized = SEPARATORS_RE.sub('_', normalized)
     normalized = normalized.lower()
-    normalized = re.sub(r'[^a-z0-9_]', '', normalized)
+    normalized = INVALID_NAME_CHARS_RE.sub('', normalized)
     return normalized
 
 def generate_rule_block(rule, env_prefix):
@@ -77,98 +172,112 @@ def generate_rule_block(rule, env_prefix):
     """
     resource_name = f"rule_{env_prefix}_{rule['id']}"
     parent_policy_id = rule.get("policyId", "unknown")
-    tf_block = f'resource "okta_policy_rule_signon" "{resource_name}" {{\n'
-    tf_block += f'  count = var.CONFIG == "{env_prefix}" ? 1 : 0\n'
-    tf_block += f'  name               = "{rule.get("name", "unnamed")}"\n'
-    tf_block += f'  status             = "{rule.get("status", "ACTIVE")}"\n'
-    
-    access = rule.get("actions", {}).get("signon", {}).get("access", "ALLOW")
-    tf_block += f'  access             = "{access}"\n'
+    # Resolve the nested sections once; every attribute below reads from these.
+    signon = (rule.get("actions") or {}).get("signon") or {}
+    session = signon.get("session") or {}
+    conditions = rule.get("conditions") or {}
     
     # Determine authtype: prefer actions.signon.authtype; if missing, use conditions.authContext.authType.
-    auth_type = rule.get("actions", {}).get("signon", {}).get("authtype")
+    auth_type = signon.get("authtype")
     if not auth_type:
-        auth_type = rule.get("conditions", {}).get("authContext", {}).get("authType", "ANY")
-    tf_block += f'  authtype           = "{auth_type}"\n'
+        auth_type = conditions.get("authContext", {}).get("authType", "ANY")
     
     # Behaviors from risk conditions.
-    behaviors = rule.get("conditions", {}).get("risk", {}).get("behaviors", [])
-    if behaviors:
-        behav_str = ", ".join([f'"{b}"' for b in behaviors])
-        tf_block += f'  behaviors          = [{behav_str}]\n'
-    else:
-        tf_block += f'  behaviors          = []\n'
-    
-    network_connection = rule.get("conditions", {}).get("network", {}).get("connection", "ANYWHERE")
-    tf_block += f'  network_connection = "{network_connection}"\n'
+    behaviors = conditions.get("risk", {}).get("behaviors", [])
     
-    identity_provider = rule.get("conditions", {}).get("identityProvider", {}).get("provider", "ANY")
-    tf_block += f'  identity_provider  = "{identity_provider}"\n'
+    identity_provider_condition = conditions.get("identityProvider", {})
+    identity_provider = identity_provider_condition.get("provider", "ANY")
     
     # If SPECIFIC_IDP, add identity_provider_ids.
+    identity_provider_ids_line = ""
     if identity_provider == "SPECIFIC_IDP":
-        idp_ids = rule.get("conditions", {}).get("identityProvider", {}).get("idpIds", [])
+        idp_ids = identity_provider_condition.get("idpIds", [])
         if idp_ids:
             idp_ids_str = ", ".join([f'"{x}"' for x in idp_ids])
-            tf_block += f'  identity_provider_ids = [{idp_ids_str}]\n'
-    
-    mfa_lifetime = rule.get("actions", {}).get("signon", {}).get("mfa_lifetime", 0)
-    tf_block += f'  mfa_lifetime       = {mfa_lifetime}\n'
+            identity_provider_ids_line = f'  identity_provider_ids = [{idp_ids_str}]\n'
     
     # For mfa_prompt, only output if either "factorPromptMode" or "mfa_prompt" exists.
-    signon = rule.get("actions", {}).get("signon", {})
     mfa_prompt = None
     if "factorPromptMode" in signon:
         mfa_prompt = signon["factorPromptMode"]
     elif "mfa_prompt" in signon:
         mfa_prompt = signon["mfa_prompt"]
-    if mfa_prompt is not None:
-        tf_block += f'  mfa_prompt         = "{mfa_prompt}"\n'
-    
-    mfa_remember_device = signon.get("rememberDeviceByDefault", False)
-    tf_block += f'  mfa_remember_device = {str(mfa_remember_device).lower()}\n'
-    
-    mfa_required = signon.get("requireFactor", False)
-    tf_block += f'  mfa_required       = {str(mfa_required).lower()}\n'
-    
-    primary_factor = signon.get("primaryFactor", "PASSWORD_IDP_ANY_FACTOR")
-    tf_block += f'  primary_factor     = "{primary_factor}"\n'
+    mfa_prompt_line = f'  mfa_prompt         = "{mfa_prompt}"\n' if mfa_prompt is not None else ""
     
     # Add users_excluded from conditions.people.users.exclude.
-    excluded_users = rule.get("conditions", {}).get("people", {}).get("users", {}).get("exclude", [])
-    if excluded_users:
-        users_excluded_str = ", ".join([f'"{u}"' for u in excluded_users])
-        tf_block += f'  users_excluded     = [{users_excluded_str}]\n'
-    else:
-        tf_block += f'  users_excluded     = []\n'
-    
-    priority = rule.get("priority", 1)
-    tf_block += f'  priority           = {priority}\n'
-    
-    risk_level = rule.get("conditions", {}).get("riskScore", {}).get("level", "ANY")
-    tf_block += f'  risc_level         = "{risk_level}"\n'
-    tf_block += f'  risk_level         = "{risk_level}"\n'
-    
-    session_idle = signon.get("session", {}).get("maxSessionIdleMinutes", 120)
-    tf_block += f'  session_idle       = {session_idle}\n'
-    
-    session_lifetime = signon.get("session", {}).get("maxSessionLifetimeMinutes", 120)
-    tf_block += f'  session_lifetime   = {session_lifetime}\n'
-    
-    session_persistent = signon.get("session", {}).get("usePersistentCookie", False)
-    tf_block += f'  session_persistent = {str(session_persistent).lower()}\n'
-    
-    tf_block += f'  policy_id          = okta_policy_signon.policy_{env_prefix}_{parent_policy_id}[0].id\n'
-    tf_block += "}\n\n"
-    
-    tf_block += "import {\n"
-    tf_block += f'  for_each = var.CONFIG == "{env_prefix}" ? toset(["{env_prefix}"]) : []\n'
-    tf_block += f'  to       = okta_policy_rule_signon.{resource_name}[0]\n'
-    tf_block += f'  id       = "{rule["policyId"]}/{rule["id"]}"\n'
-    tf_block += "}\n\n"
+    excluded_users = conditions.get("people", {}).get("users", {}).get("exclude", [])
     
+    tf_block = RULE_TEMPLATE.format(
+        resource_name=resource_name,
+        env=env_prefix,
+        name=rule.get("name", "unnamed"),
+        status=rule.get("status", "ACTIVE"),
+        access=signon.get("access", "ALLOW"),
+        auth_type=auth_type,
+        behaviors=", ".join([f'"{b}"' for b in behaviors]),
+        network_connection=conditions.get("network", {}).get("connection", "ANYWHERE"),
+        identity_provider=identity_provider,
+        identity_provider_ids_line=identity_provider_ids_line,
+        mfa_lifetime=signon.get("mfa_lifetime", 0),
+        mfa_prompt_line=mfa_prompt_line,
+        mfa_remember_device=str(signon.get("rememberDeviceByDefault", False)).lower(),
+        mfa_required=str(signon.get("requireFactor", False)).lower(),
+        primary_factor=signon.get("primaryFactor", "PASSWORD_IDP_ANY_FACTOR"),
+        users_excluded=", ".join([f'"{u}"' for u in excluded_users]),
+        priority=rule.get("priority", 1),
+        risk_level=conditions.get("riskScore", {}).get("level", "ANY"),
+        session_idle=session.get("maxSessionIdleMinutes", 120),
+        session_lifetime=session.get("maxSessionLifetimeMinutes", 120),
+        session_persistent=str(session.get("usePersistentCookie", False)).lower(),
+        parent_policy_id=parent_policy_id,
+    )
+    tf_block += IMPORT_TEMPLATE.format(
+        env=env_prefix,
+        to=f"okta_policy_rule_signon.{resource_name}[0]",
+        import_id=f'{rule["policyId"]}/{rule["id"]}',
+    )
     return tf_block
 
+def generate_group_data_blocks(group_map, env_prefix, out):
+    """Append a data "okta_group" block for every group in group_map to out."""
+    for group in group_map.values():
+        out.append(f'data "okta_group" "{env_prefix}_{group["normalized"]}" {{\n')
+        out.append(f'  name = "{group["name"]}"\n')
+        out.append("}\n\n")
+
+def generate_policy_blocks(policies, group_map, env_prefix, out):
+    """
+    Append a resource and import block for every policy to out. Included groups
+    found in group_map are referenced through their data blocks; any others are
+    emitted as literal IDs.
+    """
+    for policy in policies:
+        policy_id = policy["id"]
+        resource_name = f"policy_{env_prefix}_{policy_id}"
+        description = policy.get("description")
+        description_line = f'  description     = "{description}"\n' if description else ""
+        groups_included_line = ""
+        groups = policy.get("conditions", {}).get("people", {}).get("groups", {}).get("include", [])
+        if groups:
+            group_refs = []
+            for gid in groups:
+                if gid in group_map:
+                    group_refs.append(f"data.okta_group.{env_prefix}_{group_map[gid]['normalized']}.id")
+                else:
+                    group_refs.append(f'"{gid}"')
+            groups_included_line = f'  groups_included = [{", ".join(group_refs)}]\n'
+        out.append(POLICY_TEMPLATE.format(
+            resource_name=resource_name,
+            env=env_prefix,
+            name=policy.get("name", "unnamed"),
+            status=policy.get("status", "ACTIVE"),
+            description_line=description_line,
+            groups_included_line=groups_included_line,
+            priority=policy.get("priority", 1),
+        ))
+        out.append(IMPORT_TEMPLATE.format(
+            env=env_prefix, to=f"okta_policy_signon.{resource_name}[0]", import_id=policy_id))
+
 def generate_terraform_config(prod_policies, preview_policies, prod_rules, preview_rules,
                                 prod_group_map, preview_group_map, prod_env, preview_env):
     """
@@ -176,80 +285,22 @@ def generate_terraform_config(prod_policies, preview_policies, prod_rules, previ
     using conditional creation via count.
     The prod_env and preview_env parameters determine resource name prefixes.
     """
-    tf_config = ""
-    tf_config += (
+    parts = [
         'variable "CONFIG" {\n'
         '  description = "Environment configuration: prod, test, preview, etc."\n'
         '  type        = string\n'
         '}\n\n'
-    )
-    # Data Blocks for Production Groups
-    for group in prod_group_map.values():
-        tf_config += f'data "okta_group" "{prod_env}_{group["normalized"]}" {{\n'
-        tf_config += f'  name = "{group["name"]}"\n'
-        tf_config += "}\n\n"
-    # Data Blocks for Preview Groups
-    for group in preview_group_map.values():
-        tf_config += f'data "okta_group" "{preview_env}_{group["normalized"]}" {{\n'
-        tf_config += f'  name = "{group["name"]}"\n'
-        tf_config += "}\n\n"
-    # Production Policies
-    for policy in prod_policies:
-        resource_name = f"policy_{prod_env}_{policy['id']}"
-        tf_config += f'resource "okta_policy_signon" "{resource_name}" {{\n'
-        tf_config += f'  count = var.CONFIG == "{prod_env}" ? 1 : 0\n'
-        tf_config += f'  name            = "{policy.get("name", "unnamed")}"\n'
-        tf_config += f'  status          = "{policy.get("status", "ACTIVE")}"\n'
-        if policy.get("description"):
-            tf_config += f'  description     = "{policy.get("description")}"\n'
-        groups = policy.get("conditions", {}).get("people", {}).get("groups", {}).get("include", [])
-        if groups:
-            group_refs = []
-            for gid in groups:
-                if gid in prod_group_map:
-                    group_refs.append(f"data.okta_group.{prod_env}_{prod_group_map[gid]['normalized']}.id")
-                else:
-                    group_refs.append(f'"{gid}"')
-            tf_config += f'  groups_included = [{", ".join(group_refs)}]\n'
-        tf_config += f'  priority        = {policy.get("priority", 1)}\n'
-        tf_config += "}\n\n"
-        tf_config += "import {\n"
-        tf_config += f'  for_each = var.CONFIG == "{prod_env}" ? toset(["{prod_env}"]) : []\n'
-        tf_config += f'  to       = okta_policy_signon.{resource_name}[0]\n'
-        tf_config += f'  id       = "{policy["id"]}"\n'
-        tf_config += "}\n\n"
-    # Production Policy Rules
-    for rule in prod_rules:
-        tf_config += generate_rule_block(rule, prod_env)
-    # Preview Policies
-    for policy in preview_policies:
-        resource_name = f"policy_{preview_env}_{policy['id']}"
-        tf_config += f'resource "okta_policy_signon" "{resource_name}" {{\n'
-        tf_config += f'  count = var.CONFIG == "{preview_env}" ? 1 : 0\n'
-        tf_config += f'  name            = "{policy.get("name", "unnamed")}"\n'
-        tf_config += f'  status          = "{policy.get("status", "ACTIVE")}"\n'
-        if policy.get("description"):
-            tf_config += f'  description     = "{policy.get("description")}"\n'
-        groups = policy.get("conditions", {}).get("people", {}).get("groups", {}).get("include", [])
-        if groups:
-            group_refs = []
-            for gid in groups:
-                if gid in preview_group_map:
-                    group_refs.append(f"data.okta_group.{preview_env}_{preview_group_map[gid]['normalized']}.id")
-                else:
-                    group_refs.append(f'"{gid}"')
-            tf_config += f'  groups_included = [{", ".join(group_refs)}]\n'
-        tf_config += f'  priority        = {policy.get("priority", 1)}\n'
-        tf_config += "}\n\n"
-        tf_config += "import {\n"
-        tf_config += f'  for_each = var.CONFIG == "{preview_env}" ? toset(["{preview_env}"]) : []\n'
-        tf_config += f'  to       = okta_policy_signon.{resource_name}[0]\n'
-        tf_config += f'  id       = "{policy["id"]}"\n'
-        tf_config += "}\n\n"
-    # Preview Policy Rules
-    for rule in preview_rules:
-        tf_config += generate_rule_block(rule, preview_env)
-    return tf_config
+    ]
+    # Data Blocks for Production and Preview Groups
+    generate_group_data_blocks(prod_group_map, prod_env, parts)
+    generate_group_data_blocks(preview_group_map, preview_env, parts)
+    # Production Policies and Rules
+    generate_policy_blocks(prod_policies, prod_group_map, prod_env, parts)
+    parts.extend(generate_rule_block(rule, prod_env) for rule in prod_rules)
+    # Preview Policies and Rules
+    generate_policy_blocks(preview_policies, preview_group_map, preview_env, parts)
+    parts.extend(generate_rule_block(rule, preview_env) for rule in preview_rules)
+    return "".join(parts)
 
 def main():
     parser = argparse.ArgumentParser(
@@ -274,14 +325,22 @@ def main():
     preview_policies = []
     preview_rules = []
 
+    # One session per configured environment, reused for its policies, rules and group lookups.
+    prod_session = None
+    preview_session = None
+
     # Fetch Production Policies and Rules
     if args.prod_full_url and args.prod_api_token:
         prod_base_url = args.prod_full_url
+        prod_session = build_session(args.prod_api_token)
         print("Fetching production policies...")
         try:
-            prod_policies = fetch_policies(prod_base_url, args.prod_api_token)
-            for policy in prod_policies:
-                rules = fetch_policy_rules(prod_base_url, args.prod_api_token, policy["id"])
+            prod_policies = fetch_policies(prod_base_url, prod_session)
+            with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_REQUESTS) as executor:
+                rules_per_policy = list(executor.map(
+                    lambda policy: fetch_policy_rules(prod_base_url, prod_session, policy["id"]),
+                    prod_policies))
+            for policy, rules in zip(prod_policies, rules_per_policy):
                 for rule in rules:
                     rule["policyId"] = policy["id"]
                     prod_rules.append(rule)
@@ -293,11 +352,15 @@ def main():
     # Fetch Preview Policies and Rules
     if args.preview_full_url and args.preview_api_token:
         preview_base_url = args.preview_full_url
+        preview_session = build_session(args.preview_api_token)
         print("Fetching preview policies...")
         try:
-            preview_policies = fetch_policies(preview_base_url, args.preview_api_token)
-            for policy in preview_policies:
-                rules = fetch_policy_rules(preview_base_url, args.preview_api_token, policy["id"])
+            preview_policies = fetch_policies(preview_base_url, preview_session)
+            with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_REQUESTS) as executor:
+                rules_per_policy = list(executor.map(
+                    lambda policy: fetch_policy_rules(preview_base_url, preview_session, policy["id"]),
+                    preview_policies))
+            for policy, rules in zip(preview_policies, rules_per_policy):
                 for rule in rules:
                     rule["policyId"] = policy["id"]
                     preview_rules.append(rule)
@@ -324,29 +387,17 @@ def main():
         for gid in groups:
             preview_group_ids.add(gid)
 
-    # Build group maps by fetching details.
+    # Build group maps by fetching details concurrently.
     prod_group_map = {}
     preview_group_map = {}
     if args.prod_full_url and args.prod_api_token:
-        for gid in prod_group_ids:
-            try:
-                group_name = fetch_group_detail(args.prod_full_url, args.prod_api_token, gid)
-                normalized = normalize_group_name(group_name)
-                prod_group_map[gid] = {"name": group_name, "normalized": normalized}
-            except Exception as e:
-                print(f"Error fetching details for production group {gid}: {e}")
-                normalized = normalize_group_name(gid)
-                prod_group_map[gid] = {"name": gid, "normalized": normalized}
+        prod_group_map = fetch_group_map(args.prod_full_url, prod_session, prod_group_ids, "production")
     if args.preview_full_url and args.preview_api_token:
-        for gid in preview_group_ids:
-            try:
-                group_name = fetch_group_detail(args.preview_full_url, args.preview_api_token, gid)
-                normalized = normalize_group_name(group_name)
-                preview_group_map[gid] = {"name": group_name, "normalized": normalized}
-            except Exception as e:
-                print(f"Error fetching details for preview group {gid}: {e}")
-                normalized = normalize_group_name(gid)
-                preview_group_map[gid] = {"name": gid, "normalized": normalized}
+        preview_group_map = fetch_group_map(args.preview_full_url, preview_session, preview_group_ids, "preview")
+
+    for session in (prod_session, preview_session):
+        if session is not None:
+            session.close()
 
     print("Generating Terraform configuration...")
     tf_config = generate_terraform_config(